@@ -0,0 +1,118 @@
+// ===== LOAD TEST FIXTURES =====
+// Fixture catalog แบบ synthetic (TLE ถูกต้องตามรูปแบบพร้อม checksum, epoch = วันที่รัน)
+// และ request bodies สำหรับแต่ละ scenario
+
+// วงโคจรตัวอย่าง: [inclination, mean motion (rev/day)]
+const ORBIT_SHELLS = [
+  [51.64, 15.50],   // ISS-like
+  [53.05, 15.06],   // Starlink shell
+  [97.50, 15.20],   // Sun-synchronous
+  [86.40, 14.34],   // Iridium-like
+  [70.00, 13.80],
+  [55.00, 2.0057],  // GNSS MEO
+  [0.05, 1.0027]    // GEO
+];
+
+const tleChecksum = (line) => {
+  let sum = 0;
+  for (const ch of line) {
+    if (ch >= '0' && ch <= '9') sum += Number(ch);
+    else if (ch === '-') sum += 1;
+  }
+  return String(sum % 10);
+};
+
+const formatEpoch = (date) => {
+  const yearStart = Date.UTC(date.getUTCFullYear(), 0, 1);
+  const dayOfYear = 1 + (date.getTime() - yearStart) / 86400000;
+  const yy = String(date.getUTCFullYear() % 100).padStart(2, '0');
+  return yy + dayOfYear.toFixed(8).padStart(12, '0');
+};
+
+const angle = (value) => (value % 360).toFixed(4).padStart(8, ' ');
+
+export const buildTle = ({ satnum, inclination, raan, eccentricity, argPerigee, meanAnomaly, meanMotion, epoch }) => {
+  const id = String(satnum).padStart(5, '0');
+  const body1 = `1 ${id}U 24001A   ${formatEpoch(epoch)}  .00001000  00000-0  10000-3 0  999`;
+  const body2 = `2 ${id} ${angle(inclination)} ${angle(raan)} ${String(Math.round(eccentricity * 1e7)).padStart(7, '0')} `
+    + `${angle(argPerigee)} ${angle(meanAnomaly)} ${meanMotion.toFixed(8).padStart(11, ' ')}    1`;
+  return [body1 + tleChecksum(body1), body2 + tleChecksum(body2)];
+};
+
+export const buildCatalog = (size, epoch = new Date()) => {
+  const docs = [];
+  for (let i = 0; i < size; i++) {
+    const [inclination, meanMotion] = ORBIT_SHELLS[i % ORBIT_SHELLS.length];
+    const satnum = 90000 + i;
+    const [tle1, tle2] = buildTle({
+      satnum,
+      inclination,
+      raan: (i * 37) % 360,
+      eccentricity: 0.0001 + (i % 20) * 0.0001,
+      argPerigee: (i * 11) % 360,
+      meanAnomaly: (i * 73) % 360,
+      meanMotion,
+      epoch
+    });
+
+    docs.push({
+      _id: String(satnum),
+      OBJECT_NAME: `LOADTEST-${String(i).padStart(5, '0')}`,
+      OBJECT_ID: `2024-${String(1 + (i % 999)).padStart(3, '0')}A`,
+      NORAD_CAT_ID: String(satnum),
+      OBJECT_TYPE: 'PAYLOAD',
+      COUNTRY_CODE: 'TEST',
+      TLE_LINE0: `0 LOADTEST-${i}`,
+      TLE_LINE1: tle1,
+      TLE_LINE2: tle2,
+      date_process: epoch
+    });
+  }
+  return docs;
+};
+
+const OBSERVERS = [
+  { lat: 13.7563, lon: 100.5018 },
+  { lat: 51.4779, lon: 0.0 },
+  { lat: -33.8688, lon: 151.2093 },
+  { lat: 40.7128, lon: -74.006 }
+];
+
+const toSatellite = (doc) => ({ name: doc.OBJECT_NAME, tle1: doc.TLE_LINE1, tle2: doc.TLE_LINE2 });
+
+const pick = (items) => items[Math.floor(Math.random() * items.length)];
+
+const pickMany = (items, count) => {
+  const copy = [...items];
+  for (let i = copy.length - 1; i > 0; i--) {
+    const j = Math.floor(Math.random() * (i + 1));
+    [copy[i], copy[j]] = [copy[j], copy[i]];
+  }
+  return copy.slice(0, count);
+};
+
+// scenario -> { method, path, body }
+export const buildScenarios = (catalog, date) => ({
+  single: () => ({
+    path: '/calculate',
+    body: { ...pick(OBSERVERS), date, satellites: [toSatellite(pick(catalog))] }
+  }),
+  many: () => ({
+    path: '/calculate',
+    body: { ...pick(OBSERVERS), date, satellites: pickMany(catalog, 10).map(toSatellite) }
+  }),
+  custom: () => ({
+    path: '/calculate',
+    body: {
+      ...pick(OBSERVERS),
+      date,
+      satellites: pickMany(catalog, 3).map(toSatellite),
+      start_time: '19:00',
+      end_time: '23:00'
+    }
+  }),
+  random: () => ({
+    path: '/random-satellites',
+    body: { ...pick(OBSERVERS), date, timezone: 'UTC' }
+  })
+});
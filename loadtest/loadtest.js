@@ -0,0 +1,392 @@
+// ===== END-TO-END LOAD TEST =====
+// ยิง request ผ่าน path เต็ม: authenticateAPI -> validation -> addTimezone -> executePython -> response
+// ทำงาน offline บนเครื่อง Linux เครื่องเดียว:
+// 0. ต้องมี de440.bsp ที่ root ของ repo (ตรวจก่อนเริ่ม)
+// 1. เปิด mongod ชั่วคราว (dbpath ใน tmp) เป็น MongoDB stand-in
+// 2. seed fixture catalog, ผู้ใช้ทดสอบ และ developer API token
+// 3. เปิด server/server.js ชี้ไปที่ mongod ชั่วคราว
+// 4. ยิง request mix ตาม concurrency ที่กำหนด แล้วรายงาน throughput,
+//    p50/p95/p99 latency, error rate และ peak RSS ของ Python child processes
+//
+// การใช้งาน:
+//   npm run loadtest -- --concurrency 8 --duration 60 --mix single:4,many:2,custom:2,random:1
+//
+// Options (หรือ env ชื่อเดียวกันแบบตัวพิมพ์ใหญ่ขึ้นต้นด้วย LOADTEST_):
+//   --concurrency   จำนวน request พร้อมกัน (default 4)
+//   --duration      ระยะเวลายิง (วินาที, default 30)
+//   --requests      หยุดเมื่อครบจำนวน request (default ไม่จำกัด)
+//   --mix           สัดส่วน scenario: single, many, custom, random
+//   --catalog-size  จำนวนดาวเทียมใน fixture catalog (default 500)
+//   --port          port ของ server (default 3900)
+//   --mongo-port    port ของ mongod (default 27900)
+//   --mongod        path ของ mongod binary (default: MONGOD_BIN หรือ 'mongod')
+//   --output        เขียนผลเป็น JSON ลงไฟล์
+
+import { spawn } from 'child_process';
+import fs from 'fs';
+import os from 'os';
+import path from 'path';
+import net from 'net';
+import { fileURLToPath } from 'url';
+import mongoose from 'mongoose';
+import bcrypt from 'bcryptjs';
+import jwt from 'jsonwebtoken';
+import Satellite from '../models/satellite.js';
+import User from '../models/user.js';
+import Token from '../models/token.js';
+import { buildCatalog, buildScenarios } from './fixtures.js';
+
+const __filename = fileURLToPath(import.meta.url);
+const __dirname = path.dirname(__filename);
+const rootDir = path.join(__dirname, '..');
+
+const API_JWT_SECRET = 'loadtest-api-secret';
+const DB_NAME = 'loadtest_orbit';
+// Python scripts เรียก load('de440.bsp') จาก cwd ของ server (root ของ repo)
+const EPHEMERIS_PATH = path.join(rootDir, 'de440.bsp');
+
+// ===== OPTIONS =====
+
+const parseOptions = (argv) => {
+  const options = {
+    concurrency: 4,
+    duration: 30,
+    requests: Infinity,
+    mix: 'single:4,many:2,custom:2,random:1',
+    catalogSize: 500,
+    port: 3900,
+    mongoPort: 27900,
+    mongod: process.env.MONGOD_BIN || 'mongod',
+    output: null
+  };
+
+  const keys = {
+    '--concurrency': 'concurrency',
+    '--duration': 'duration',
+    '--requests': 'requests',
+    '--mix': 'mix',
+    '--catalog-size': 'catalogSize',
+    '--port': 'port',
+    '--mongo-port': 'mongoPort',
+    '--mongod': 'mongod',
+    '--output': 'output'
+  };
+
+  for (const [flag, key] of Object.entries(keys)) {
+    const envValue = process.env[`LOADTEST_${flag.slice(2).replace(/-/g, '_').toUpperCase()}`];
+    if (envValue !== undefined) options[key] = envValue;
+  }
+
+  for (let i = 0; i < argv.length; i++) {
+    const key = keys[argv[i]];
+    if (!key) throw new Error(`Unknown option: ${argv[i]}`);
+    options[key] = argv[++i];
+  }
+
+  for (const key of ['concurrency', 'duration', 'requests', 'catalogSize', 'port', 'mongoPort']) {
+    options[key] = Number(options[key]);
+  }
+
+  options.mix = options.mix.split(',').map(part => {
+    const [name, weight] = part.split(':');
+    return { name: name.trim(), weight: Number(weight || 1) };
+  });
+
+  return options;
+};
+
+// ===== PROCESS HELPERS =====
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+const waitForPort = async (port, timeoutMs, child) => {
+  const deadline = Date.now() + timeoutMs;
+  while (Date.now() < deadline) {
+    if (child.startError) throw child.startError;
+    if (child.exitCode !== null) {
+      throw new Error(`Process exited with code ${child.exitCode} before listening on port ${port}:\n${child.logs.join('')}`);
+    }
+    const open = await new Promise(resolve => {
+      const socket = net.connect(port, '127.0.0.1');
+      socket.once('connect', () => { socket.destroy(); resolve(true); });
+      socket.once('error', () => resolve(false));
+    });
+    if (open) return;
+    await sleep(200);
+  }
+  throw new Error(`Timed out waiting for port ${port}`);
+};
+
+const startProcess = (command, args, options) => {
+  const child = spawn(command, args, { stdio: ['ignore', 'pipe', 'pipe'], ...options });
+  const logs = [];
+  const capture = (data) => {
+    logs.push(data.toString());
+    if (logs.length > 200) logs.shift();
+  };
+  child.stdout.on('data', capture);
+  child.stderr.on('data', capture);
+  child.on('error', err => { child.startError = err; });
+  child.logs = logs;
+  return child;
+};
+
+const stopProcess = async (child) => {
+  if (!child || child.exitCode !== null) return;
+  child.kill('SIGTERM');
+  await Promise.race([new Promise(resolve => child.once('exit', resolve)), sleep(5000)]);
+  if (child.exitCode === null) child.kill('SIGKILL');
+};
+
+// ===== PYTHON RSS SAMPLER (Linux /proc) =====
+
+const readProcStatus = (pid) => {
+  try {
+    return fs.readFileSync(`/proc/${pid}/status`, 'utf8');
+  } catch {
+    return null;
+  }
+};
+
+const statusField = (status, field) => {
+  const match = status.match(new RegExp(`^${field}:\\s+(\\d+)`, 'm'));
+  return match ? Number(match[1]) : 0;
+};
+
+const startRssSampler = (serverPid, intervalMs = 100) => {
+  const stats = { peakRssKb: 0, processesSeen: new Set() };
+
+  const sample = () => {
+    let pids;
+    try {
+      pids = fs.readdirSync('/proc').filter(name => /^\d+$/.test(name));
+    } catch {
+      return;
+    }
+
+    for (const pid of pids) {
+      const status = readProcStatus(pid);
+      if (!status || statusField(status, 'PPid') !== serverPid) continue;
+      if (!/^Name:\s+python/m.test(status)) continue;
+
+      stats.processesSeen.add(pid);
+      // VmHWM = peak RSS ของ process นั้นตั้งแต่เริ่ม
+      stats.peakRssKb = Math.max(stats.peakRssKb, statusField(status, 'VmHWM'), statusField(status, 'VmRSS'));
+    }
+  };
+
+  const timer = setInterval(sample, intervalMs);
+  return {
+    stop: () => {
+      clearInterval(timer);
+      return { peakRssMb: +(stats.peakRssKb / 1024).toFixed(1), pythonProcesses: stats.processesSeen.size };
+    }
+  };
+};
+
+// ===== SEEDING =====
+
+const seedDatabase = async (mongoUri, catalogSize) => {
+  await mongoose.connect(mongoUri);
+
+  await Promise.all([Satellite.deleteMany({}), User.deleteMany({}), Token.deleteMany({})]);
+
+  const catalog = buildCatalog(catalogSize);
+  await Satellite.insertMany(catalog);
+
+  const user = await User.create({
+    name: 'Load',
+    lastname: 'Test',
+    email: 'loadtest@example.com',
+    password: await bcrypt.hash('loadtest', 10)
+  });
+
+  const expiryDays = 1;
+  const expiresAt = new Date(Date.now() + expiryDays * 24 * 60 * 60 * 1000);
+  const apiToken = jwt.sign({
+    userId: user._id,
+    type: 'developer_api_token',
+    tokenName: 'loadtest',
+    iat: Math.floor(Date.now() / 1000),
+    exp: Math.floor(expiresAt.getTime() / 1000)
+  }, API_JWT_SECRET);
+
+  await Token.createJWT({
+    userId: user._id,
+    name: 'loadtest',
+    jwt: apiToken,
+    createdAt: new Date(),
+    expiresAt,
+    lastUsed: null
+  });
+
+  await mongoose.disconnect();
+  return { catalog, apiToken };
+};
+
+// ===== LOAD GENERATION =====
+
+const percentile = (sorted, p) => {
+  if (sorted.length === 0) return null;
+  const index = Math.min(sorted.length - 1, Math.ceil((p / 100) * sorted.length) - 1);
+  return +sorted[Math.max(0, index)].toFixed(1);
+};
+
+const summarize = (samples, elapsedSeconds) => {
+  const latencies = samples.map(s => s.latencyMs).sort((a, b) => a - b);
+  const errors = samples.filter(s => !s.ok).length;
+  return {
+    requests: samples.length,
+    errors,
+    errorRate: samples.length ? +(errors / samples.length).toFixed(4) : 0,
+    throughputRps: +(samples.length / elapsedSeconds).toFixed(3),
+    p50Ms: percentile(latencies, 50),
+    p95Ms: percentile(latencies, 95),
+    p99Ms: percentile(latencies, 99)
+  };
+};
+
+const runLoad = async ({ baseUrl, apiToken, scenarios, mix, concurrency, durationSeconds, maxRequests }) => {
+  const totalWeight = mix.reduce((sum, m) => sum + m.weight, 0);
+  const chooseScenario = () => {
+    let r = Math.random() * totalWeight;
+    for (const m of mix) {
+      r -= m.weight;
+      if (r <= 0) return m.name;
+    }
+    return mix[mix.length - 1].name;
+  };
+
+  const samples = [];
+  const deadline = Date.now() + durationSeconds * 1000;
+  let issued = 0;
+
+  const worker = async () => {
+    while (Date.now() < deadline && issued < maxRequests) {
+      issued++;
+      const scenario = chooseScenario();
+      const { path: requestPath, body } = scenarios[scenario]();
+      const started = process.hrtime.bigint();
+      let ok = false;
+      let status = 0;
+
+      try {
+        const response = await fetch(`${baseUrl}${requestPath}`, {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json', Authorization: `Bearer ${apiToken}` },
+          body: JSON.stringify(body)
+        });
+        status = response.status;
+        const data = await response.json().catch(() => null);
+        ok = response.ok && data?.success !== false;
+      } catch {
+        ok = false;
+      }
+
+      const latencyMs = Number(process.hrtime.bigint() - started) / 1e6;
+      samples.push({ scenario, ok, status, latencyMs });
+    }
+  };
+
+  const started = Date.now();
+  await Promise.all(Array.from({ length: concurrency }, worker));
+  const elapsedSeconds = (Date.now() - started) / 1000;
+
+  const byScenario = {};
+  for (const { name } of mix) {
+    byScenario[name] = summarize(samples.filter(s => s.scenario === name), elapsedSeconds);
+  }
+
+  return { elapsedSeconds: +elapsedSeconds.toFixed(2), overall: summarize(samples, elapsedSeconds), byScenario };
+};
+
+// ===== MAIN =====
+
+const main = async () => {
+  const options = parseOptions(process.argv.slice(2));
+  const scenarioNames = ['single', 'many', 'custom', 'random'];
+  for (const { name } of options.mix) {
+    if (!scenarioNames.includes(name)) throw new Error(`Unknown scenario in --mix: ${name}`);
+  }
+
+  // ถ้าไม่มี ephemeris skyfield จะพยายามดาวน์โหลด ซึ่งล้มเหลวเมื่อ offline (ทุก request จะ error)
+  if (!fs.existsSync(EPHEMERIS_PATH)) {
+    console.error(`Missing ephemeris file ${EPHEMERIS_PATH}. Copy de440.bsp into the repository root before running the load test offline.`);
+    process.exit(1);
+  }
+
+  const dbPath = fs.mkdtempSync(path.join(os.tmpdir(), 'orbit-loadtest-'));
+  const mongoUri = `mongodb://127.0.0.1:${options.mongoPort}/${DB_NAME}`;
+  let mongod = null;
+  let server = null;
+
+  try {
+    console.log(`Starting mongod on port ${options.mongoPort} (dbpath ${dbPath})`);
+    mongod = startProcess(options.mongod, ['--dbpath', dbPath, '--port', String(options.mongoPort), '--bind_ip', '127.0.0.1', '--quiet']);
+    await waitForPort(options.mongoPort, 30000, mongod);
+
+    console.log(`Seeding ${options.catalogSize} fixture satellites and a test API token`);
+    const { catalog, apiToken } = await seedDatabase(mongoUri, options.catalogSize);
+
+    console.log(`Starting server on port ${options.port}`);
+    server = startProcess('node', [path.join(rootDir, 'server/server.js')], {
+      cwd: rootDir,
+      env: {
+        ...process.env,
+        PORT: String(options.port),
+        MONGO_URI: mongoUri,
+        MONGODB_URI: mongoUri,
+        DB_NAME,
+        JWT_SECRET: 'loadtest-web-secret',
+        API_JWT_SECRET,
+        SESSION_SECRET: 'loadtest-session-secret'
+      }
+    });
+    await waitForPort(options.port, 30000, server);
+
+    const today = new Date().toISOString().slice(0, 10);
+    const sampler = startRssSampler(server.pid);
+
+    console.log(`Running load: concurrency=${options.concurrency}, duration=${options.duration}s, mix=${options.mix.map(m => `${m.name}:${m.weight}`).join(',')}`);
+    const result = await runLoad({
+      baseUrl: `http://127.0.0.1:${options.port}`,
+      apiToken,
+      scenarios: buildScenarios(catalog, today),
+      mix: options.mix,
+      concurrency: options.concurrency,
+      durationSeconds: options.duration,
+      maxRequests: options.requests
+    });
+
+    const report = {
+      options: {
+        concurrency: options.concurrency,
+        duration: options.duration,
+        mix: options.mix,
+        catalogSize: options.catalogSize
+      },
+      ...result,
+      python: sampler.stop()
+    };
+
+    console.log(JSON.stringify(report, null, 2));
+    if (options.output) {
+      fs.writeFileSync(options.output, JSON.stringify(report, null, 2));
+      console.log(`Report written to ${options.output}`);
+    }
+
+    if (report.overall.requests > 0 && report.overall.errors === report.overall.requests) {
+      console.error('All requests failed. Last server output:\n' + server.logs.slice(-20).join(''));
+      process.exitCode = 1;
+    }
+  } finally {
+    await stopProcess(server);
+    await stopProcess(mongod);
+    fs.rmSync(dbPath, { recursive: true, force: true });
+  }
+};
+
+main().catch(err => {
+  console.error('Load test failed:', err);
+  process.exit(1);
+});
@@ -2,8 +2,12 @@ import sys
 import json
 from datetime import datetime, timedelta
 import pytz
-from skyfield.api import load, EarthSatellite, wgs84, Topos
+from skyfield.api import load, EarthSatellite, wgs84
 import math
+import numpy as np
+from eclipse import EclipseEngine, SHADOW_MODELS, DEFAULT_SHADOW_MODEL
+from solar import SunModel, ACCURACY_TIERS, DEFAULT_ACCURACY, accuracy_info
+from time_grid import utc_grid, to_skyfield_time, format_utc, LocalTimeZone
 
 input_data = json.load(sys.stdin)
 
@@ -19,6 +23,13 @@ timezone_str = input_data.get('timezone', 'UTC')
 time_mode = input_data.get('time_mode', 'auto')
 start_time_str = input_data.get('start_time', '')
 end_time_str = input_data.get('end_time', '')
+eclipse_model = input_data.get('eclipse_model', DEFAULT_SHADOW_MODEL)
+accuracy = input_data.get('accuracy', DEFAULT_ACCURACY)
+
+if eclipse_model not in SHADOW_MODELS:
+    eclipse_model = DEFAULT_SHADOW_MODEL
+if accuracy not in ACCURACY_TIERS:
+    accuracy = DEFAULT_ACCURACY
 
 ts = load.timescale()
 local_tz = pytz.timezone(timezone_str)
@@ -26,6 +37,7 @@ local_tz = pytz.timezone(timezone_str)
 target_date = datetime.strptime(date_str, '%Y-%m-%d')
 
 eph = load('de440.bsp')
+sun_model = SunModel(eph, accuracy)
 
 # ------------------------
 # กำหนดช่วงเวลาตาม mode
@@ -40,16 +52,12 @@ if time_mode == 'custom' and start_time_str and end_time_str:
     if end_datetime <= start_datetime:
         end_datetime += timedelta(days=1)
     
-    # แปลงเป็น UTC
-    start_utc = local_tz.localize(start_datetime).astimezone(pytz.UTC)
-    end_utc = local_tz.localize(end_datetime).astimezone(pytz.UTC)
+    # แปลงเป็น UTC epoch seconds
+    start_epoch = local_tz.localize(start_datetime).timestamp()
+    end_epoch = local_tz.localize(end_datetime).timestamp()
     
     # สร้าง time steps ทุกนาที
-    time_steps = []
-    current_time = start_utc
-    while current_time <= end_utc:
-        time_steps.append(current_time)
-        current_time += timedelta(minutes=1)
+    step_epochs = utc_grid(start_epoch, end_epoch, 60)
     
     calculation_method = "Custom Time Range"
     
@@ -58,28 +66,26 @@ else:
     utc_midnight = datetime.combine(target_date.date(), datetime.min.time()).replace(tzinfo=pytz.UTC)
     
     # หาช่วงเวลากลางคืน (sun_alt <= -12)
-    night_time_steps = []
-    second_steps = list(range(0, 24 * 60 * 60, 60))  # ทุก 1 นาที
+    midnight_epoch = utc_midnight.timestamp()
+    day_epochs = utc_grid(midnight_epoch, midnight_epoch + 24 * 60 * 60 - 60, 60)  # ทุก 1 นาที
     
-    for second in second_steps:
-        utc_time = utc_midnight + timedelta(seconds=second)
-        t = ts.from_datetime(utc_time)
-        
-        # คำนวณมุมดวงอาทิตย์
-        observer_sun = eph['earth'] + Topos(latitude_degrees=latitude, longitude_degrees=longitude)
-        astrometric = observer_sun.at(t).observe(eph['sun'])
-        apparent = astrometric.apparent()
-        sun_alt, sun_az, sun_distance = apparent.altaz()
-        
-        if sun_alt.degrees <= -12:  # เฉพาะช่วงกลางคืน
-            night_time_steps.append(utc_time)
+    # คำนวณมุมดวงอาทิตย์ของทุกนาทีในครั้งเดียว
+    sun_alt_day = sun_model.altitude_degrees(to_skyfield_time(ts, day_epochs), latitude, longitude)
     
-    time_steps = night_time_steps
+    step_epochs = day_epochs[sun_alt_day <= -12]  # เฉพาะช่วงกลางคืน
     calculation_method = "Auto Night Detection"
     
-    if not time_steps:
+    if not len(step_epochs):
         calculation_method = "No valid time range found (Sun altitude never ≤ -12°)"
 
+has_time_steps = len(step_epochs) > 0
+
+# เวลาท้องถิ่นของทุก time step จัดรูปแบบครั้งเดียว ใช้ร่วมกันทุกส่วน
+if has_time_steps:
+    local_zone = LocalTimeZone(local_tz, step_epochs[0], step_epochs[-1])
+    step_local_strings = local_zone.format(step_epochs)
+    step_utc_strings = format_utc(step_epochs)
+
 
 # ------------------------
 # ส่วน 1: Orbit Info
@@ -129,15 +135,9 @@ for sat_info in tle_list:
     distance_per_step_km = orbital_velocity_km_s * time_step_seconds
 
     # ใช้ช่วงเวลาที่กำหนด
-    if time_steps:
-        start_utc = time_steps[0]
-        end_utc = time_steps[-1]
-        start_local = start_utc.astimezone(local_tz)
-        end_local = end_utc.astimezone(local_tz)
-        duration_seconds = (end_utc - start_utc).total_seconds()
+    if has_time_steps:
+        duration_seconds = float(step_epochs[-1] - step_epochs[0])
     else:
-        start_local = datetime.now(local_tz)
-        end_local = start_local + timedelta(seconds=orbital_period_seconds)
         duration_seconds = orbital_period_seconds
 
     # OMM parameters
@@ -158,31 +158,37 @@ for sat_info in tle_list:
 
     # ตำแหน่งตามรอบโคจร - คำนวณในช่วงเวลาที่กำหนด
     satellite_points = []
-    current_point_time = start_local
-    while current_point_time <= end_local:
-        dt_utc = current_point_time.astimezone(pytz.UTC)
-        
-        # ตรวจสอบว่าเวลานี้อยู่ในช่วงที่กำหนดหรือไม่
-        if dt_utc in time_steps or any(abs((dt_utc - step).total_seconds()) < 30 for step in time_steps):
-            t = ts.from_datetime(dt_utc)
-            
-            # คำนวณมุมดวงอาทิตย์
-            observer_sun = eph['earth'] + Topos(latitude_degrees=latitude, longitude_degrees=longitude)
-            astrometric = observer_sun.at(t).observe(eph['sun'])
-            apparent = astrometric.apparent()
-            sun_alt, sun_az, sun_distance = apparent.altaz()
-            
-            subpoint = satellite.at(t).subpoint()
-            satellite_points.append({
-                "datetime_local": current_point_time.strftime("%Y-%m-%d %H:%M:%S"),
-                "datetime_utc": dt_utc.strftime("%Y-%m-%d %H:%M:%S UTC"),
-                "latitude": round(subpoint.latitude.degrees, 6),
-                "longitude": round(subpoint.longitude.degrees, 6),
-                "elevation_km": round(subpoint.elevation.km, 2),
-                "sun_alt": round(sun_alt.degrees, 2)
-            })
-        
-        current_point_time += timedelta(seconds=time_step_seconds)
+    if has_time_steps:
+        point_epochs = utc_grid(float(step_epochs[0]), float(step_epochs[-1]), time_step_seconds)
+
+        # ตรวจสอบว่าเวลานี้อยู่ในช่วงที่กำหนดหรือไม่ (ห่างจาก time step ที่ใกล้ที่สุดไม่ถึง 30 วินาที)
+        right = np.clip(np.searchsorted(step_epochs, point_epochs), 0, len(step_epochs) - 1)
+        left = np.clip(right - 1, 0, len(step_epochs) - 1)
+        gap = np.minimum(np.abs(point_epochs - step_epochs[right]), np.abs(point_epochs - step_epochs[left]))
+        point_epochs = point_epochs[gap < 30]
+
+        if len(point_epochs):
+            t_points = to_skyfield_time(ts, point_epochs)
+
+            # คำนวณมุมดวงอาทิตย์และตำแหน่งของทุกจุดในครั้งเดียว
+            sun_alt_points = sun_model.altitude_degrees(t_points, latitude, longitude)
+            subpoints = satellite.at(t_points).subpoint()
+            point_latitudes = subpoints.latitude.degrees
+            point_longitudes = subpoints.longitude.degrees
+            point_elevations = subpoints.elevation.km
+
+            point_local_strings = local_zone.format(point_epochs, with_zone=False)
+            point_utc_strings = format_utc(point_epochs)
+
+            for i in range(len(point_epochs)):
+                satellite_points.append({
+                    "datetime_local": point_local_strings[i],
+                    "datetime_utc": point_utc_strings[i],
+                    "latitude": round(float(point_latitudes[i]), 6),
+                    "longitude": round(float(point_longitudes[i]), 6),
+                    "elevation_km": round(float(point_elevations[i]), 2),
+                    "sun_alt": round(float(sun_alt_points[i]), 2)
+                })
 
     orbit_infos.append({
         "name": name,
@@ -194,9 +200,9 @@ for sat_info in tle_list:
         "radius_km": round(radius_km, 2),
         "orbitaldistance_km": round(2 * math.pi * radius_km, 2),
         "observation_period": {
-            "start_local": start_local.strftime("%Y-%m-%d %H:%M:%S %Z") if time_steps else "N/A",
-            "end_local": end_local.strftime("%Y-%m-%d %H:%M:%S %Z") if time_steps else "N/A",
-            "duration_minutes": round(duration_seconds / 60, 2) if time_steps else 0,
+            "start_local": step_local_strings[0] if has_time_steps else "N/A",
+            "end_local": step_local_strings[-1] if has_time_steps else "N/A",
+            "duration_minutes": round(duration_seconds / 60, 2) if has_time_steps else 0,
             "calculation_method": calculation_method
         },
         "positions": satellite_points
@@ -207,62 +213,80 @@ for sat_info in tle_list:
 # ------------------------
 minute_results = []
 
-for utc_time in time_steps:
-    local_time = utc_time.astimezone(local_tz)
-    t = ts.from_datetime(utc_time)
+if has_time_steps:
+    t_steps = to_skyfield_time(ts, step_epochs)
 
-    hour_data = {
-        "local_time": local_time.strftime("%Y-%m-%d %H:%M:%S %Z"),
-        "utc_time": utc_time.strftime("%Y-%m-%d %H:%M:%S UTC"),
-        "satellites": []
-    }
+    # มุมดวงอาทิตย์ของทุก time step ในครั้งเดียว
+    sun_alt_degrees = sun_model.altitude_degrees(t_steps, latitude, longitude)
 
-    # มุมดวงอาทิตย์
-    observer_sun = eph['earth'] + Topos(latitude_degrees=latitude, longitude_degrees=longitude)
-    astrometric = observer_sun.at(t).observe(eph['sun'])
-    apparent = astrometric.apparent()
-    sun_alt, sun_az, sun_distance = apparent.altaz()
+    # ตำแหน่งดวงอาทิตย์คำนวณครั้งเดียว ใช้ร่วมกันทุกดวง
+    eclipse_engine = EclipseEngine(eph, t_steps, eclipse_model, sun_model)
+    observer_location = wgs84.latlon(latitude, longitude)
 
+    # alt/az และ sunlit ของดาวเทียมแต่ละดวงตลอดทั้ง time grid
+    satellite_series = []
     for sat_info in tle_list:
         name = sat_info['name']
         tle1 = sat_info['tle1']
         tle2 = sat_info['tle2']
         satellite = EarthSatellite(tle1, tle2, name, ts)
 
-        # alt/az ของดาวเทียม
-        difference = satellite - wgs84.latlon(latitude, longitude)
-        topocentric = difference.at(t)
-        alt, az, distance = topocentric.altaz()
-
-        sunlit_bool = bool(satellite.at(t).is_sunlit(eph))
+        difference = satellite - observer_location
+        alt, az, distance = difference.at(t_steps).altaz()
 
-        is_visible = bool((alt.degrees > 0) and sunlit_bool and (sun_alt.degrees <= -12))
-
-        hour_data["satellites"].append({
+        satellite_series.append({
             "name": name,
-            "altitude": round(alt.degrees, 6),
-            "azimuth": round(az.degrees, 6),
-            "distance_km": round(distance.km, 3),
-            "is_sunlit": sunlit_bool,
-            "is_visible": is_visible,
-            "sun_alt": round(sun_alt.degrees, 2)
+            "altitude": alt.degrees,
+            "azimuth": az.degrees,
+            "distance_km": distance.km,
+            "is_sunlit": eclipse_engine.sunlit(satellite.at(t_steps).position.km)
         })
 
-    minute_results.append(hour_data)
+    for i in range(len(step_epochs)):
+        sun_alt_value = float(sun_alt_degrees[i])
+
+        hour_data = {
+            "local_time": step_local_strings[i],
+            "utc_time": step_utc_strings[i],
+            "satellites": []
+        }
+
+        for series in satellite_series:
+            alt_value = float(series["altitude"][i])
+            sunlit_bool = bool(series["is_sunlit"][i])
+
+            is_visible = bool((alt_value > 0) and sunlit_bool and (sun_alt_value <= -12))
+
+            hour_data["satellites"].append({
+                "name": series["name"],
+                "altitude": round(alt_value, 6),
+                "azimuth": round(float(series["azimuth"][i]), 6),
+                "distance_km": round(float(series["distance_km"][i]), 3),
+                "is_sunlit": sunlit_bool,
+                "is_visible": is_visible,
+                "sun_alt": round(sun_alt_value, 2)
+            })
+
+        minute_results.append(hour_data)
 
 # ------------------------
 # ส่วน 3: Current Position (Real-time)
 # ------------------------
 current_positions = []
 current_utc = datetime.utcnow().replace(tzinfo=pytz.UTC)
-current_local = current_utc.astimezone(local_tz)
-current_t = ts.from_datetime(current_utc)
+current_epoch = current_utc.timestamp()
+current_t_grid = to_skyfield_time(ts, [current_epoch])
+current_t = current_t_grid[0]
+
+# จัดรูปแบบเวลาปัจจุบันครั้งเดียว ใช้ร่วมกันทุกดวง
+current_utc_string = format_utc([current_epoch])[0]
+current_local_string = LocalTimeZone(local_tz, current_epoch, current_epoch).format([current_epoch])[0]
 
 # คำนวณมุมดวงอาทิตย์ ณ เวลาปัจจุบัน
-observer_sun_current = eph['earth'] + Topos(latitude_degrees=latitude, longitude_degrees=longitude)
-astrometric_current = observer_sun_current.at(current_t).observe(eph['sun'])
-apparent_current = astrometric_current.apparent()
-current_sun_alt, current_sun_az, current_sun_distance = apparent_current.altaz()
+current_sun_alt = float(sun_model.altitude_degrees(current_t, latitude, longitude))
+
+# ตำแหน่งดวงอาทิตย์ ณ เวลาปัจจุบัน ใช้ร่วมกันทุกดวง
+current_eclipse_engine = EclipseEngine(eph, current_t_grid, eclipse_model, sun_model)
 
 for sat_info in tle_list:
     name = sat_info['name']
@@ -283,10 +307,10 @@ for sat_info in tle_list:
     alt_current, az_current, distance_current = topocentric_current.altaz()
     
     # ตรวจสอบว่าได้รับแสงอาทิตย์หรือไม่
-    sunlit_current = bool(satellite.at(current_t).is_sunlit(eph))
+    sunlit_current = bool(current_eclipse_engine.sunlit(satellite.at(current_t_grid).position.km)[0])
     
     # ตรวจสอบการมองเห็น
-    is_visible_current = bool((alt_current.degrees > 0) and sunlit_current and (current_sun_alt.degrees <= -12))
+    is_visible_current = bool((alt_current.degrees > 0) and sunlit_current and (current_sun_alt <= -12))
 
     # หาความเร็วจาก orbit info ที่คำนวณไว้
     orbital_velocity = None
@@ -297,8 +321,8 @@ for sat_info in tle_list:
 
     current_positions.append({
         "name": name,
-        "current_time_utc": current_utc.strftime("%Y-%m-%d %H:%M:%S UTC"),
-        "current_time_local": current_local.strftime("%Y-%m-%d %H:%M:%S %Z"),
+        "current_time_utc": current_utc_string,
+        "current_time_local": current_local_string,
         "latitude": round(subpoint_current.latitude.degrees, 6),
         "longitude": round(subpoint_current.longitude.degrees, 6),
         "elevation_km": round(subpoint_current.elevation.km, 2),
@@ -308,7 +332,7 @@ for sat_info in tle_list:
         "orbital_velocity_km_s": round(orbital_velocity, 3) if orbital_velocity else None,
         "is_sunlit": sunlit_current,
         "is_visible": is_visible_current,
-        "sun_altitude": round(current_sun_alt.degrees, 2)
+        "sun_altitude": round(current_sun_alt, 2)
     })
 
 # ------------------------
@@ -324,15 +348,17 @@ output = {
     "calculation_info": {
         "time_mode": time_mode,
         "calculation_method": calculation_method,
-        "total_time_steps": len(time_steps),
-        "observation_start_utc": time_steps[0].strftime("%Y-%m-%d %H:%M:%S UTC") if time_steps else "N/A",
-        "observation_end_utc": time_steps[-1].strftime("%Y-%m-%d %H:%M:%S UTC") if time_steps else "N/A",
+        "total_time_steps": len(step_epochs),
+        "observation_start_utc": step_utc_strings[0] if has_time_steps else "N/A",
+        "observation_end_utc": step_utc_strings[-1] if has_time_steps else "N/A",
         "custom_start_time": start_time_str if time_mode == 'custom' else None,
-        "custom_end_time": end_time_str if time_mode == 'custom' else None
+        "custom_end_time": end_time_str if time_mode == 'custom' else None,
+        "eclipse_model": eclipse_model,
+        "accuracy": accuracy_info(accuracy)
     },
     "calculation_time": {
-        "utc": current_utc.strftime("%Y-%m-%d %H:%M:%S UTC"),
-        "local": current_local.strftime("%Y-%m-%d %H:%M:%S %Z"),
+        "utc": current_utc_string,
+        "local": current_local_string,
         "timestamp": current_utc.timestamp()
     },
     "orbit_info": orbit_infos,
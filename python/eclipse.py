@@ -0,0 +1,180 @@
+"""
+Eclipse engine: ตรวจสอบว่าดาวเทียมอยู่ในเงาโลกหรือไม่ แบบ vectorized
+
+ใช้แทนการเรียก satellite.at(t).is_sunlit(eph) ทีละดวงทีละเวลา
+- คำนวณตำแหน่งดวงอาทิตย์ครั้งเดียวต่อ time grid (ใช้ร่วมกันทุกดวง)
+- ประเมินเงาโลกของทั้ง array (satellite x time) ในครั้งเดียว
+
+Shadow models
+- 'cylindrical': เงาทรงกระบอกรัศมีเท่าโลก (ผลตรงกับ skyfield is_sunlit
+  ยกเว้นจุดที่ห่างจากขอบเงาไม่เกินราว 0.5 km)
+- 'cone': เงาทรงกรวย umbra/penumbra พร้อมสัดส่วนแสงที่ได้รับ (0..1)
+  ดาวเทียมถือว่า sunlit ถ้าไม่ได้อยู่ใน umbra ทั้งหมด
+
+ตรวจความสอดคล้องกับ skyfield:
+    python eclipse.py <tle_file> [model]
+"""
+import sys
+import numpy as np
+
+# รัศมีโลกเท่ากับที่ skyfield ใช้ใน is_sunlit (ERAD)
+EARTH_RADIUS_KM = 6378.1366
+SUN_RADIUS_KM = 696000.0
+
+SHADOW_MODELS = ('cylindrical', 'cone')
+DEFAULT_SHADOW_MODEL = 'cylindrical'
+
+
+def sun_position_km(eph, t):
+    """ตำแหน่งดวงอาทิตย์เทียบกับศูนย์กลางโลก (km) shape (3, N) สำหรับ Time array"""
+    return (eph['sun'] - eph['earth']).at(t).position.km
+
+
+def satellite_positions_km(satellites, t):
+    """ตำแหน่ง GCRS ของดาวเทียมหลายดวง (km) shape (S, 3, N)"""
+    if not satellites:
+        return np.empty((0, 3, len(t.tt)))
+    return np.stack([satellite.at(t).position.km for satellite in satellites])
+
+
+def _cylindrical_fraction(sat_km, sun_km):
+    sun_unit = sun_km / np.linalg.norm(sun_km, axis=0)
+    projection = np.sum(sat_km * sun_unit, axis=-2)
+    perpendicular = sat_km - projection[..., np.newaxis, :] * sun_unit
+    distance_from_axis = np.linalg.norm(perpendicular, axis=-2)
+    in_shadow = (projection < 0) & (distance_from_axis < EARTH_RADIUS_KM)
+    return np.where(in_shadow, 0.0, 1.0)
+
+
+def _cone_fraction(sat_km, sun_km):
+    # มุมรัศมีปรากฏของดวงอาทิตย์ (a) และโลก (b) เมื่อมองจากดาวเทียม
+    # และมุมระหว่างจุดศูนย์กลางทั้งสอง (c)
+    sat_to_sun = sun_km - sat_km
+    sat_to_sun_dist = np.linalg.norm(sat_to_sun, axis=-2)
+    sat_dist = np.linalg.norm(sat_km, axis=-2)
+
+    a = np.arcsin(np.clip(SUN_RADIUS_KM / sat_to_sun_dist, -1.0, 1.0))
+    b = np.arcsin(np.clip(EARTH_RADIUS_KM / sat_dist, -1.0, 1.0))
+    cos_c = -np.sum(sat_km * sat_to_sun, axis=-2) / (sat_dist * sat_to_sun_dist)
+    c = np.arccos(np.clip(cos_c, -1.0, 1.0))
+
+    fraction = np.ones_like(c)
+
+    # umbra: จานโลกบังดวงอาทิตย์ทั้งดวง
+    umbra = c <= b - a
+    # annular: จานโลกเล็กกว่าและอยู่ภายในจานดวงอาทิตย์
+    annular = c < a - b
+    # penumbra: จานทั้งสองซ้อนกันบางส่วน
+    penumbra = (c < a + b) & ~umbra & ~annular
+
+    fraction = np.where(umbra, 0.0, fraction)
+    fraction = np.where(annular, 1.0 - (b * b) / (a * a), fraction)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        x = (c * c + a * a - b * b) / (2.0 * c)
+        y = np.sqrt(np.clip(a * a - x * x, 0.0, None))
+        overlap = (a * a * np.arccos(np.clip(x / a, -1.0, 1.0))
+                   + b * b * np.arccos(np.clip((c - x) / b, -1.0, 1.0))
+                   - c * y)
+        partial = 1.0 - overlap / (np.pi * a * a)
+
+    fraction = np.where(penumbra, np.clip(partial, 0.0, 1.0), fraction)
+    return fraction
+
+
+def illumination_fraction(sat_km, sun_km, model=DEFAULT_SHADOW_MODEL):
+    """
+    สัดส่วนแสงอาทิตย์ที่ดาวเทียมได้รับ (0 = อยู่ในเงามืด, 1 = ได้รับแสงเต็มที่)
+
+    sat_km: ตำแหน่งดาวเทียม shape (3, N) หรือ (S, 3, N)
+    sun_km: ตำแหน่งดวงอาทิตย์ shape (3, N) ใช้ร่วมกันทุกดวง
+    """
+    if model not in SHADOW_MODELS:
+        raise ValueError(f"Unknown shadow model '{model}'. Expected one of {SHADOW_MODELS}")
+
+    sat_km = np.asarray(sat_km, dtype=float)
+    sun_km = np.asarray(sun_km, dtype=float)
+
+    if model == 'cone':
+        return _cone_fraction(sat_km, sun_km)
+    return _cylindrical_fraction(sat_km, sun_km)
+
+
+def is_sunlit(sat_km, sun_km, model=DEFAULT_SHADOW_MODEL):
+    """bool array: ดาวเทียมได้รับแสงอาทิตย์หรือไม่ (shape เดียวกับผลของ illumination_fraction)"""
+    return illumination_fraction(sat_km, sun_km, model) > 0.0
+
+
+class EclipseEngine:
+    """
+    เก็บตำแหน่งดวงอาทิตย์ของ time grid ไว้ครั้งเดียว แล้วใช้ซ้ำกับดาวเทียมทุกดวง
+    sun_model: ถ้าระบุ (solar.SunModel) จะใช้ position_km ของ model นั้นแทน DE440
+    """
+    def __init__(self, eph, t, model=DEFAULT_SHADOW_MODEL, sun_model=None):
+        if model not in SHADOW_MODELS:
+            raise ValueError(f"Unknown shadow model '{model}'. Expected one of {SHADOW_MODELS}")
+        self.model = model
+        self.t = t
+        self.sun_km = sun_model.position_km(t) if sun_model is not None else sun_position_km(eph, t)
+
+    def illumination(self, sat_km):
+        return illumination_fraction(sat_km, self.sun_km, self.model)
+
+    def sunlit(self, sat_km):
+        return is_sunlit(sat_km, self.sun_km, self.model)
+
+    def sunlit_for(self, satellites):
+        """bool array shape (S, N) สำหรับรายการ EarthSatellite"""
+        return self.sunlit(satellite_positions_km(satellites, self.t))
+
+
+def compare_with_skyfield(satellites, eph, t, model=DEFAULT_SHADOW_MODEL):
+    """
+    เปรียบเทียบผลกับ skyfield is_sunlit
+
+    คืนค่า dict: จำนวนจุดทั้งหมด, จำนวนจุดที่ไม่ตรงกัน และสัดส่วนที่ตรงกัน
+    - cylindrical: ควรตรงกันเกือบ 100% (ต่างกันเฉพาะจุดบนขอบเงา)
+    - cone: ต่างกันได้เฉพาะช่วง penumbra (ไม่เกินราว 10 วินาทีต่อการเข้า/ออกเงาของ LEO)
+    """
+    engine = EclipseEngine(eph, t, model)
+    ours = engine.sunlit_for(satellites)
+    reference = np.stack([np.asarray(satellite.at(t).is_sunlit(eph), dtype=bool)
+                          for satellite in satellites])
+
+    total = int(reference.size)
+    mismatches = int(np.count_nonzero(ours != reference))
+    return {
+        'model': model,
+        'total_points': total,
+        'mismatches': mismatches,
+        'agreement': 1.0 - mismatches / total if total else 1.0
+    }
+
+
+def main():
+    from skyfield.api import load, EarthSatellite
+
+    if len(sys.argv) < 2:
+        print("Usage: python eclipse.py <tle_file> [cylindrical|cone]", file=sys.stderr)
+        sys.exit(1)
+
+    model = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_SHADOW_MODEL
+    ts = load.timescale()
+    eph = load('de440.bsp')
+
+    with open(sys.argv[1], encoding='utf-8') as f:
+        lines = [line.rstrip() for line in f if line.strip()]
+
+    satellites = []
+    for i in range(0, len(lines) - 2, 3):
+        satellites.append(EarthSatellite(lines[i + 1], lines[i + 2], lines[i].strip(), ts))
+
+    # ทุก 1 นาทีตลอด 1 วัน
+    now = ts.now()
+    t = ts.tt_jd(now.tt + np.arange(0, 24 * 60) / (24 * 60))
+
+    print(compare_with_skyfield(satellites, eph, t, model))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,474 @@
+"""
+Nightly pass table: ตาราง pass ของทั้ง catalog ที่คำนวณล่วงหน้าทุกคืน
+
+สำหรับ observer แต่ละจุด (จุดศูนย์กลางของ grid cell ขนาด cell_size_degrees
+และ registered sites จากไฟล์ NIGHTLY_SITES_FILE) หา pass ที่มองเห็นได้ของทุกดาวเทียม
+(sunlit ณ peak และมุมดวงอาทิตย์ ณ peak ≤ max_sun_elevation)
+- rise / peak / set (UTC epoch seconds)
+- peak elevation, sunlit ณ peak และมุมดวงอาทิตย์ ณ peak
+เก็บลง SQLite พร้อม index (observer_id, peak_utc)
+
+เก็บเฉพาะสิ่งที่ lookup ใช้: pass ที่ดีที่สุด 1 pass ต่อ (observer, ดาวเทียม, คืน)
+และไม่เกิน candidates_per_night ดวง (peak elevation สูงสุด) ต่อ (observer, คืน)
+"คืน" นับตามเวลาสุริยะท้องถิ่นของ observer (เที่ยงวันถึงเที่ยงวัน)
+
+วิธีคำนวณ: propagate ดาวเทียมแต่ละดวงครั้งเดียว (ตำแหน่ง ITRS ทุก sample_step_seconds)
+แล้วหาความสูงเหนือระนาบขอบฟ้าของทุก observer พร้อมกันด้วย matrix product
+คำนวณมุมเงย, peak และ interpolate rise/set เฉพาะจุดที่อยู่เหนือขอบฟ้า
+(pass ที่สั้นกว่า 1 sample เป็น pass เฉียดขอบฟ้า ไม่ใช้เป็น candidate อยู่แล้ว)
+
+ช่วงเวลาของ run_date D ครอบคลุม UTC [D - 14h, D + 36h]
+เพื่อให้ครอบคลุมวัน D ตามเวลาท้องถิ่นของทุก timezone
+
+random_satellite_calculate.py ใช้ตารางนี้เลือก candidates ของ cell ที่ผู้ใช้อยู่
+แล้วคำนวณแบบละเอียดเฉพาะ candidates เหล่านั้นที่พิกัดจริง
+
+การใช้งาน (cron ทุกวันเวลา 00:00 UTC)
+    python nightly_pass_table.py build [YYYY-MM-DD]
+
+ไฟล์ sites (JSON): [{"name": "Bangkok", "lat": 13.75, "lon": 100.5}, ...]
+
+ตั้งค่าผ่าน env (ค่าเริ่มต้น: build ราว 0.15 s ต่อดาวเทียม, ตารางไม่เกิน ~1M แถวต่อ run)
+    NIGHTLY_CELL_SIZE_DEGREES      ขนาด grid cell (default 5)
+    NIGHTLY_MIN_LATITUDE           ขอบล่างของแถบละติจูด (default -60)
+    NIGHTLY_MAX_LATITUDE           ขอบบนของแถบละติจูด (default 60)
+    NIGHTLY_SAMPLE_STEP_SECONDS    ระยะห่างของ coarse grid (default 120)
+    NIGHTLY_CANDIDATES_PER_NIGHT   จำนวน candidates ต่อ (observer, คืน) (default 200)
+"""
+import sys
+import json
+import os
+import math
+import sqlite3
+from datetime import datetime, timedelta
+import numpy as np
+import pytz
+from skyfield.api import load, EarthSatellite, wgs84
+from skyfield.framelib import itrs
+from pymongo import MongoClient
+from eclipse import is_sunlit, DEFAULT_SHADOW_MODEL
+from time_grid import utc_grid, to_skyfield_time
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nightly_passes.sqlite')
+SITE_ID_OFFSET = 1_000_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS observers (
+    observer_id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    name TEXT,
+    lat REAL NOT NULL,
+    lon REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS passes (
+    observer_id INTEGER NOT NULL,
+    run_date TEXT NOT NULL,
+    norad_id TEXT NOT NULL,
+    name TEXT,
+    rise_utc REAL,
+    peak_utc REAL NOT NULL,
+    set_utc REAL,
+    peak_elevation REAL NOT NULL,
+    peak_sunlit INTEGER NOT NULL,
+    peak_sun_elevation REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_passes_observer_peak ON passes (observer_id, peak_utc);
+CREATE INDEX IF NOT EXISTS idx_passes_run_date ON passes (run_date);
+CREATE TABLE IF NOT EXISTS runs (
+    run_date TEXT PRIMARY KEY,
+    built_at TEXT NOT NULL,
+    cell_size_degrees REAL NOT NULL,
+    satellites INTEGER NOT NULL,
+    observers INTEGER NOT NULL
+);
+"""
+
+
+PASS_COLUMNS = ('observer', 'rise_utc', 'peak_utc', 'set_utc', 'peak_elevation', 'peak_sun_elevation')
+
+
+def concat_passes(parts):
+    """รวม dict ของ array หลายชุดเป็นชุดเดียว"""
+    if not parts:
+        return {'observer': np.empty(0, dtype=np.int64),
+                **{key: np.empty(0) for key in PASS_COLUMNS[1:]}}
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+
+class NightlyPassTable:
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.getenv('NIGHTLY_PASS_DB', DEFAULT_DB_PATH)
+        self.sites_file = os.getenv('NIGHTLY_SITES_FILE', '')
+
+        self.cell_size_degrees = float(os.getenv('NIGHTLY_CELL_SIZE_DEGREES', '5'))
+        self.min_latitude = float(os.getenv('NIGHTLY_MIN_LATITUDE', '-60'))
+        self.max_latitude = float(os.getenv('NIGHTLY_MAX_LATITUDE', '60'))
+        self.sample_step_seconds = int(os.getenv('NIGHTLY_SAMPLE_STEP_SECONDS', '120'))
+        self.candidates_per_night = int(os.getenv('NIGHTLY_CANDIDATES_PER_NIGHT', '200'))
+        self.site_radius_km = 25.0
+        self.retain_days = 2
+        self.max_sun_elevation = -12.0
+        self.eclipse_model = DEFAULT_SHADOW_MODEL
+        self.observer_chunk = 1024
+        self.compact_every = 200
+
+    @classmethod
+    def open_if_available(cls, db_path=None):
+        """คืน NightlyPassTable ถ้ามีไฟล์ฐานข้อมูลแล้ว มิฉะนั้นคืน None"""
+        table = cls(db_path)
+        if not os.path.exists(table.db_path):
+            return None
+        return table
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript(SCHEMA)
+        return conn
+
+    # ------------------------
+    # Observers
+    # ------------------------
+    @property
+    def n_lon_cells(self):
+        return int(round(360 / self.cell_size_degrees))
+
+    def cell_id(self, lat, lon):
+        lat_idx = int(math.floor((lat + 90) / self.cell_size_degrees))
+        lon_idx = int(math.floor(((lon + 180) % 360) / self.cell_size_degrees))
+        return lat_idx * self.n_lon_cells + lon_idx
+
+    def cell_center(self, cell_id):
+        lat_idx, lon_idx = divmod(cell_id, self.n_lon_cells)
+        return (-90 + (lat_idx + 0.5) * self.cell_size_degrees,
+                -180 + (lon_idx + 0.5) * self.cell_size_degrees)
+
+    def load_sites(self):
+        if not self.sites_file or not os.path.exists(self.sites_file):
+            return []
+        with open(self.sites_file, encoding='utf-8') as f:
+            return json.load(f)
+
+    def observers(self):
+        """รายการ observer ทั้งหมด: (observer_id, kind, name, lat, lon)"""
+        observers = []
+        lat = self.min_latitude
+        while lat < self.max_latitude:
+            lon = -180.0
+            while lon < 180.0:
+                cell = self.cell_id(lat, lon)
+                center_lat, center_lon = self.cell_center(cell)
+                observers.append((cell, 'cell', None, center_lat, center_lon))
+                lon += self.cell_size_degrees
+            lat += self.cell_size_degrees
+
+        for i, site in enumerate(self.load_sites()):
+            observers.append((SITE_ID_OFFSET + i, 'site', site.get('name'), float(site['lat']), float(site['lon'])))
+        return observers
+
+    # ------------------------
+    # Build
+    # ------------------------
+    def load_catalog(self, mongo_uri):
+        client = MongoClient(mongo_uri)
+        try:
+            db_name = os.getenv('DB_NAME', 'project_orbit')
+            docs = client[db_name]['satellite'].find(
+                {
+                    "TLE_LINE1": {"$exists": True, "$ne": ""},
+                    "TLE_LINE2": {"$exists": True, "$ne": ""},
+                    "OBJECT_NAME": {"$exists": True, "$ne": ""}
+                },
+                {"OBJECT_NAME": 1, "NORAD_CAT_ID": 1, "TLE_LINE1": 1, "TLE_LINE2": 1}
+            )
+            return [{
+                'name': doc.get('OBJECT_NAME', 'Unknown'),
+                'norad_id': str(doc.get('NORAD_CAT_ID', '')),
+                'tle1': doc.get('TLE_LINE1', ''),
+                'tle2': doc.get('TLE_LINE2', '')
+            } for doc in docs]
+        finally:
+            client.close()
+
+    def observer_vectors(self, observers):
+        """up vector (geodetic) และตำแหน่ง ITRS (km) ของ observers: array shape (O, 3) ทั้งคู่"""
+        lat = np.array([observer[3] for observer in observers])
+        lon = np.array([observer[4] for observer in observers])
+        lat_rad = np.radians(lat)
+        lon_rad = np.radians(lon)
+        up = np.column_stack((np.cos(lat_rad) * np.cos(lon_rad),
+                              np.cos(lat_rad) * np.sin(lon_rad),
+                              np.sin(lat_rad)))
+        position_km = wgs84.latlon(lat, lon).itrs_xyz.km.T
+        return up, position_km
+
+    def compute_satellite_passes(self, sat_km, sunlit, sun_unit, epochs, observer_up, observer_km):
+        """
+        pass ที่มองเห็นได้ของดาวเทียม 1 ดวงสำหรับทุก observer
+        sat_km, sun_unit: ITRS shape (3, N) บน coarse grid, sunlit: shape (N,)
+        คืนค่า dict ของ array: observer (index), rise_utc, peak_utc, set_utc (nan ถ้าอยู่นอกช่วง),
+        peak_elevation, peak_sun_elevation
+        """
+        step = float(epochs[1] - epochs[0])
+        last_sample = sat_km.shape[1] - 1
+        parts = []
+
+        for chunk_start in range(0, len(observer_up), self.observer_chunk):
+            up = observer_up[chunk_start:chunk_start + self.observer_chunk]
+            obs_km = observer_km[chunk_start:chunk_start + self.observer_chunk]
+
+            # ความสูงเหนือระนาบขอบฟ้าของ observer (km): > 0 คืออยู่เหนือขอบฟ้า
+            height = up @ sat_km - np.sum(up * obs_km, axis=1)[:, np.newaxis]
+            obs_idx, sample_idx = np.nonzero(height > 0)
+            if not len(obs_idx):
+                continue
+
+            # แบ่งเป็น pass: observer เปลี่ยน หรือ sample ไม่ต่อเนื่อง
+            new_pass = np.ones(len(obs_idx), dtype=bool)
+            new_pass[1:] = (obs_idx[1:] != obs_idx[:-1]) | (sample_idx[1:] != sample_idx[:-1] + 1)
+            starts = np.flatnonzero(new_pass)
+            stops = np.append(starts[1:], len(obs_idx))
+            pass_id = np.cumsum(new_pass) - 1
+
+            # มุมเงยเฉพาะจุดที่อยู่เหนือขอบฟ้า
+            slant_km = np.linalg.norm(sat_km[:, sample_idx].T - obs_km[obs_idx], axis=1)
+            elevation = np.degrees(np.arcsin(np.clip(height[obs_idx, sample_idx] / slant_km, -1.0, 1.0)))
+
+            # peak: จุดที่มุมเงยสูงสุดของแต่ละ pass
+            peak_pos = np.lexsort((-elevation, pass_id))[starts]
+            pass_obs = obs_idx[starts]
+            peak_sample = sample_idx[peak_pos]
+
+            # มองเห็นได้: sunlit ณ peak และท้องฟ้ามืดพอ
+            peak_sunlit = sunlit[peak_sample]
+            peak_sun_elevation = np.degrees(np.arcsin(np.clip(
+                np.sum(up[pass_obs] * sun_unit[:, peak_sample].T, axis=1), -1.0, 1.0)))
+            keep = peak_sunlit & (peak_sun_elevation <= self.max_sun_elevation)
+            if not keep.any():
+                continue
+
+            starts, stops, pass_obs = starts[keep], stops[keep], pass_obs[keep]
+            peak_pos, peak_sample = peak_pos[keep], peak_sample[keep]
+            peak_sun_elevation = peak_sun_elevation[keep]
+
+            # refine peak ด้วย parabola ผ่าน 3 samples (เมื่อ peak ไม่อยู่ที่ขอบ pass)
+            peak_elevation = elevation[peak_pos]
+            peak_utc = epochs[peak_sample].astype(float)
+            inner = (peak_pos > starts) & (peak_pos < stops - 1)
+            if inner.any():
+                before = elevation[peak_pos[inner] - 1]
+                center = peak_elevation[inner]
+                after = elevation[peak_pos[inner] + 1]
+                curvature = before - 2 * center + after
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    offset = np.where(curvature < 0, 0.5 * (before - after) / curvature, 0.0)
+                offset = np.clip(offset, -0.5, 0.5)
+                peak_utc[inner] += offset * step
+                peak_elevation[inner] = center - 0.25 * (before - after) * offset
+
+            # rise/set: interpolate ความสูงเหนือขอบฟ้าระหว่าง sample ที่ข้ามขอบฟ้า
+            first = sample_idx[starts]
+            last = sample_idx[stops - 1]
+            rise_utc = np.full(len(first), np.nan)
+            set_utc = np.full(len(last), np.nan)
+
+            has_rise = first > 0
+            h_out = height[pass_obs[has_rise], first[has_rise] - 1]
+            h_in = height[pass_obs[has_rise], first[has_rise]]
+            rise_utc[has_rise] = epochs[first[has_rise] - 1] + h_out / (h_out - h_in) * step
+
+            has_set = last < last_sample
+            h_in = height[pass_obs[has_set], last[has_set]]
+            h_out = height[pass_obs[has_set], last[has_set] + 1]
+            set_utc[has_set] = epochs[last[has_set]] + h_in / (h_in - h_out) * step
+
+            parts.append({
+                'observer': chunk_start + pass_obs,
+                'rise_utc': rise_utc,
+                'peak_utc': peak_utc,
+                'set_utc': set_utc,
+                'peak_elevation': peak_elevation,
+                'peak_sun_elevation': peak_sun_elevation
+            })
+        return concat_passes(parts)
+
+    def night_index(self, utc_epochs, longitude):
+        """คืนตามเวลาสุริยะท้องถิ่นของ observer (เที่ยงวันถึงเที่ยงวัน) เป็นเลขวัน"""
+        return np.floor((utc_epochs + longitude * 240.0 - 43200.0) / 86400.0).astype(np.int64)
+
+    def keep_best_passes(self, passes, observer_lon):
+        """
+        เหลือ pass ที่ดีที่สุด 1 pass ต่อ (observer, satellite, คืน)
+        แล้วเหลือไม่เกิน candidates_per_night ดวงที่ peak elevation สูงสุดต่อ (observer, คืน)
+        """
+        if not len(passes['observer']):
+            return passes
+        night = self.night_index(passes['peak_utc'], observer_lon[passes['observer']])
+        elevation = passes['peak_elevation']
+
+        # เรียง (observer, คืน, peak elevation มากไปน้อย): ลำดับนี้ใช้ได้ทั้งสองขั้น
+        order = np.lexsort((-elevation, night, passes['observer']))
+        observer, night, satellite = passes['observer'][order], night[order], passes['satellite'][order]
+        group_start = np.ones(len(order), dtype=bool)
+        group_start[1:] = (observer[1:] != observer[:-1]) | (night[1:] != night[:-1])
+
+        # pass แรกของแต่ละ (observer, คืน, satellite) คือ pass ที่ดีที่สุด
+        group = np.cumsum(group_start) - 1
+        _, first = np.unique(group * (int(satellite.max()) + 1) + satellite, return_index=True)
+        best = np.zeros(len(order), dtype=bool)
+        best[first] = True
+        order, group_start = order[best], group_start[best]
+
+        # อันดับภายในกลุ่ม (observer, คืน): pass แรกของกลุ่มเป็น best ของดาวเทียมนั้นเสมอ จึงยังเป็นจุดเริ่มกลุ่ม
+        starts = np.flatnonzero(group_start)
+        rank = np.arange(len(order)) - starts[np.cumsum(group_start) - 1]
+        keep = order[rank < self.candidates_per_night]
+        return {key: value[keep] for key, value in passes.items()}
+
+    def build(self, run_date=None, mongo_uri='mongodb://localhost:27017'):
+        """คำนวณ pass ของ run_date (ค่าเริ่มต้นคือวันนี้ตาม UTC) สำหรับทุก observer"""
+        ts = load.timescale()
+        eph = load('de440.bsp')
+
+        run_date = run_date or datetime.utcnow().strftime('%Y-%m-%d')
+        day_start = datetime.strptime(run_date, '%Y-%m-%d').replace(tzinfo=pytz.UTC)
+        epochs = utc_grid((day_start - timedelta(hours=14)).timestamp(),
+                          (day_start + timedelta(hours=36)).timestamp(),
+                          self.sample_step_seconds)
+        t = to_skyfield_time(ts, epochs)
+
+        # ตำแหน่งดวงอาทิตย์ (ITRS) คำนวณครั้งเดียว ใช้ร่วมกันทุกดาวเทียม
+        sun_km = (eph['sun'] - eph['earth']).at(t).frame_xyz(itrs).km
+        sun_unit = sun_km / np.linalg.norm(sun_km, axis=0)
+
+        satellites = []
+        for sat_data in self.load_catalog(mongo_uri):
+            try:
+                satellites.append((EarthSatellite(sat_data['tle1'], sat_data['tle2'], sat_data['name'], ts), sat_data))
+            except Exception:
+                continue
+
+        observers = self.observers()
+        observer_up, observer_km = self.observer_vectors(observers)
+        observer_lon = np.array([observer[4] for observer in observers])
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM passes WHERE run_date = ?", (run_date,))
+                oldest = (day_start - timedelta(days=self.retain_days)).strftime('%Y-%m-%d')
+                conn.execute("DELETE FROM passes WHERE run_date < ?", (oldest,))
+                conn.executemany(
+                    "INSERT OR REPLACE INTO observers (observer_id, kind, name, lat, lon) VALUES (?, ?, ?, ?, ?)",
+                    observers
+                )
+
+            # สะสม pass แล้วตัดเหลือเฉพาะที่ดีที่สุดเป็นระยะ เพื่อจำกัดหน่วยความจำ
+            kept = []
+            for sat_index, (satellite, sat_data) in enumerate(satellites):
+                # propagate ครั้งเดียวต่อดวง ใช้ร่วมกันทุก observer
+                try:
+                    sat_km = satellite.at(t).frame_xyz(itrs).km
+                except Exception:
+                    continue
+                sunlit = is_sunlit(sat_km, sun_km, self.eclipse_model)
+
+                passes = self.compute_satellite_passes(sat_km, sunlit, sun_unit, epochs, observer_up, observer_km)
+                passes['satellite'] = np.full(len(passes['observer']), sat_index)
+                kept.append(passes)
+                if len(kept) > self.compact_every:
+                    kept = [self.keep_best_passes(concat_passes(kept), observer_lon)]
+
+            best = self.keep_best_passes(concat_passes(kept), observer_lon)
+            rows = []
+            for i in range(len(best['observer'])):
+                sat_data = satellites[best['satellite'][i]][1]
+                rise_utc, set_utc = best['rise_utc'][i], best['set_utc'][i]
+                rows.append((
+                    observers[best['observer'][i]][0], run_date, sat_data['norad_id'], sat_data['name'],
+                    None if np.isnan(rise_utc) else float(rise_utc),
+                    float(best['peak_utc'][i]),
+                    None if np.isnan(set_utc) else float(set_utc),
+                    float(best['peak_elevation'][i]),
+                    1,
+                    float(best['peak_sun_elevation'][i])
+                ))
+            with conn:
+                conn.executemany(
+                    "INSERT INTO passes (observer_id, run_date, norad_id, name, rise_utc, peak_utc, set_utc, "
+                    "peak_elevation, peak_sunlit, peak_sun_elevation) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO runs (run_date, built_at, cell_size_degrees, satellites, observers) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (run_date, datetime.utcnow().replace(tzinfo=pytz.UTC).isoformat(),
+                     self.cell_size_degrees, len(satellites), len(observers))
+                )
+        finally:
+            conn.close()
+
+        return {'run_date': run_date, 'satellites': len(satellites), 'observers': len(observers)}
+
+    # ------------------------
+    # Lookup
+    # ------------------------
+    def _observer_for(self, conn, lat, lon):
+        """registered site ที่อยู่ใกล้ไม่เกิน site_radius_km ก่อน มิฉะนั้นใช้ grid cell"""
+        sites = conn.execute("SELECT observer_id, lat, lon FROM observers WHERE kind = 'site'").fetchall()
+        for observer_id, site_lat, site_lon in sites:
+            # ระยะทางบนผิวโลกโดยประมาณ (haversine)
+            d_lat = math.radians(site_lat - lat)
+            d_lon = math.radians(site_lon - lon)
+            h = (math.sin(d_lat / 2) ** 2
+                 + math.cos(math.radians(lat)) * math.cos(math.radians(site_lat)) * math.sin(d_lon / 2) ** 2)
+            if 2 * 6371.0 * math.asin(math.sqrt(h)) <= self.site_radius_km:
+                return observer_id
+        return self.cell_id(lat, lon)
+
+    def candidate_norad_ids(self, lat, lon, start_utc, end_utc):
+        """
+        NORAD IDs ของดาวเทียมที่มี pass ซึ่ง peak อยู่ในช่วงเวลา, ได้รับแสงอาทิตย์ ณ peak
+        และท้องฟ้ามืดพอ เรียงตาม peak elevation
+        คืนค่า None ถ้าตารางยังไม่มีข้อมูลที่ครอบคลุมช่วงเวลานี้
+        """
+        conn = self._connect()
+        try:
+            # เลือก run ล่าสุดที่ครอบคลุมช่วงเวลาที่ขอ (run_date D ครอบคลุม D - 14h ถึง D + 36h)
+            run = None
+            for run_date, cell_size in conn.execute("SELECT run_date, cell_size_degrees FROM runs ORDER BY run_date DESC"):
+                day_start = datetime.strptime(run_date, '%Y-%m-%d').replace(tzinfo=pytz.UTC)
+                if day_start - timedelta(hours=14) <= start_utc and end_utc <= day_start + timedelta(hours=36):
+                    run = (run_date, cell_size)
+                    break
+            if run is None:
+                return None
+            run_date, self.cell_size_degrees = run
+
+            observer_id = self._observer_for(conn, lat, lon)
+            # กรองความมืดทุก mode: ช่วง auto ครอบคลุมทั้งวันท้องถิ่น (รวมช่วงกลางวันระหว่าง dark steps)
+            query = ("SELECT norad_id, MAX(peak_elevation) AS best FROM passes "
+                     "WHERE observer_id = ? AND peak_utc BETWEEN ? AND ? AND run_date = ? AND peak_sunlit = 1 "
+                     "AND peak_sun_elevation <= ? "
+                     "GROUP BY norad_id ORDER BY best DESC")
+            params = [observer_id, start_utc.timestamp(), end_utc.timestamp(), run_date, self.max_sun_elevation]
+
+            return [row[0] for row in conn.execute(query, params)]
+        finally:
+            conn.close()
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else 'build'
+    if command != 'build':
+        print(f"Unknown command: {command}", file=sys.stderr)
+        sys.exit(1)
+
+    run_date = sys.argv[2] if len(sys.argv) > 2 else None
+    mongo_uri = os.getenv('MONGO_URI', 'mongodb://localhost:27017')
+    result = NightlyPassTable().build(run_date, mongo_uri)
+    print(json.dumps({'success': True, **result}))
+
+
+if __name__ == "__main__":
+    main()
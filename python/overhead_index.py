@@ -0,0 +1,392 @@
+"""
+Overhead index: ตอบคำถาม "ดาวเทียมดวงไหนอยู่เหนือขอบฟ้าและได้รับแสงอาทิตย์ ณ ตำแหน่งนี้"
+จากตำแหน่ง Earth-fixed (ECEF/ITRS) ที่คำนวณล่วงหน้าของทั้ง catalog
+
+Pipeline
+1. build: propagate ทุกดวงใน collection 'satellite' ลงบน time grid คงที่
+   เก็บเป็น memory-mapped arrays
+   - positions.npy     float32 (T, N, 3)  ตำแหน่ง ECEF (km)
+   - sunlit.npy        bool    (T, N)     อยู่นอกเงาโลกหรือไม่
+   - sun.npy           float32 (T, 3)     ทิศดวงอาทิตย์ ECEF (unit vector)
+   - order.npy         int32   (T, N)     index ดาวเทียมเรียงตาม sky cell
+   - cell_start.npy    int32   (T, C + 1) ตำแหน่งเริ่มของแต่ละ cell ใน order
+   - cell_radius.npy   float32 (T, C)     รัศมีวงโคจรสูงสุดของดาวเทียมใน cell
+   sky cell แบ่งตาม lat/lon ของ sub-satellite point ขนาด cell_size_degrees
+2. query: เลือกเฉพาะ cell ที่อาจมองเห็นได้จากผู้สังเกต แล้วตรวจ elevation จริง
+3. refresh: สร้างใหม่เมื่อ TLE ใน catalog ถูกอัปเดต (date_process ใหม่กว่า)
+   หรือ time grid ที่เหลือสั้นกว่า min_remaining_hours
+
+การใช้งาน
+    python overhead_index.py build      # สร้าง index ใหม่ทันที
+    python overhead_index.py refresh    # สร้างใหม่เฉพาะเมื่อจำเป็น (ใช้กับ cron ทุกชั่วโมง)
+    echo '{"lat": 13.7, "lon": 100.5}' | python overhead_index.py query
+    echo '{"lat": 13.7, "lon": 100.5, "start": "2025-01-01T12:00:00Z",
+           "end": "2025-01-01T22:00:00Z"}' | python overhead_index.py query
+"""
+import sys
+import json
+import os
+import shutil
+from datetime import datetime, timedelta
+import numpy as np
+import pytz
+from skyfield.api import load, EarthSatellite, wgs84
+from skyfield.framelib import itrs
+from pymongo import MongoClient
+from eclipse import EclipseEngine, EARTH_RADIUS_KM, DEFAULT_SHADOW_MODEL
+
+DEFAULT_INDEX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'overhead_cache')
+
+
+class OverheadIndex:
+    def __init__(self, index_dir=None, mongo_uri='mongodb://localhost:27017'):
+        self.index_dir = index_dir or os.getenv('OVERHEAD_INDEX_DIR', DEFAULT_INDEX_DIR)
+        self.mongo_uri = mongo_uri
+
+        self.grid_hours = 24
+        self.grid_step_seconds = 60
+        self.min_remaining_hours = 12
+        self.cell_size_degrees = 10.0
+        self.min_elevation_angle = 0.0
+        self.eclipse_model = DEFAULT_SHADOW_MODEL
+
+        self.n_lat_cells = int(round(180 / self.cell_size_degrees))
+        self.n_lon_cells = int(round(360 / self.cell_size_degrees))
+        self.n_cells = self.n_lat_cells * self.n_lon_cells
+
+        self.metadata = None
+        self.arrays = {}
+
+    # ------------------------
+    # Catalog
+    # ------------------------
+    def _connect(self):
+        client = MongoClient(self.mongo_uri)
+        db_name = os.getenv('DB_NAME', 'project_orbit')
+        return client, client[db_name]['satellite']
+
+    def load_catalog(self, collection):
+        docs = collection.find(
+            {
+                "TLE_LINE1": {"$exists": True, "$ne": ""},
+                "TLE_LINE2": {"$exists": True, "$ne": ""},
+                "OBJECT_NAME": {"$exists": True, "$ne": ""}
+            },
+            {"OBJECT_NAME": 1, "NORAD_CAT_ID": 1, "TLE_LINE1": 1, "TLE_LINE2": 1}
+        )
+        return [{
+            'name': doc.get('OBJECT_NAME', 'Unknown'),
+            'norad_id': doc.get('NORAD_CAT_ID', ''),
+            'tle1': doc.get('TLE_LINE1', ''),
+            'tle2': doc.get('TLE_LINE2', '')
+        } for doc in docs]
+
+    def latest_catalog_update(self, collection):
+        """เวลาที่ TLE ใน catalog ถูกอัปเดตล่าสุด (ISO string) หรือ None"""
+        doc = collection.find_one(
+            {"date_process": {"$exists": True}},
+            {"date_process": 1},
+            sort=[("date_process", -1)]
+        )
+        if not doc or not doc.get('date_process'):
+            return None
+        return doc['date_process'].replace(tzinfo=pytz.UTC).isoformat()
+
+    # ------------------------
+    # Build
+    # ------------------------
+    def _cell_ids(self, xyz_km):
+        """sky cell ของ sub-satellite point (geocentric lat/lon) สำหรับ array (..., 3)"""
+        x, y, z = xyz_km[..., 0], xyz_km[..., 1], xyz_km[..., 2]
+        lat = np.degrees(np.arctan2(z, np.hypot(x, y)))
+        lon = np.degrees(np.arctan2(y, x))
+        lat_idx = np.clip(((lat + 90) // self.cell_size_degrees).astype(np.int32), 0, self.n_lat_cells - 1)
+        lon_idx = np.clip(((lon + 180) // self.cell_size_degrees).astype(np.int32), 0, self.n_lon_cells - 1)
+        return lat_idx * self.n_lon_cells + lon_idx
+
+    def build(self, start_utc=None):
+        """propagate ทั้ง catalog ลง time grid และสร้าง sky-cell index"""
+        ts = load.timescale()
+        eph = load('de440.bsp')
+
+        client, collection = self._connect()
+        try:
+            catalog = self.load_catalog(collection)
+            catalog_updated = self.latest_catalog_update(collection)
+        finally:
+            client.close()
+
+        if start_utc is None:
+            start_utc = datetime.utcnow().replace(tzinfo=pytz.UTC)
+        start_utc = start_utc.replace(second=0, microsecond=0)
+
+        n_steps = int(self.grid_hours * 3600 // self.grid_step_seconds) + 1
+        offsets = np.arange(n_steps) * self.grid_step_seconds
+        t = ts.utc(start_utc.year, start_utc.month, start_utc.day,
+                   start_utc.hour, start_utc.minute, offsets)
+
+        satellites = []
+        entries = []
+        for sat_data in catalog:
+            try:
+                satellites.append(EarthSatellite(sat_data['tle1'], sat_data['tle2'], sat_data['name'], ts))
+                entries.append({'name': sat_data['name'], 'norad_id': sat_data['norad_id']})
+            except Exception:
+                continue
+
+        n_sats = len(satellites)
+        build_name = 'build-' + start_utc.strftime('%Y%m%dT%H%M%S')
+        build_dir = os.path.join(self.index_dir, build_name)
+        os.makedirs(build_dir, exist_ok=True)
+
+        def open_array(name, dtype, shape):
+            return np.lib.format.open_memmap(os.path.join(build_dir, name), mode='w+', dtype=dtype, shape=shape)
+
+        positions = open_array('positions.npy', np.float32, (n_steps, n_sats, 3))
+        sunlit = open_array('sunlit.npy', np.bool_, (n_steps, n_sats))
+
+        # ตำแหน่งดวงอาทิตย์คำนวณครั้งเดียวต่อ time grid
+        eclipse_engine = EclipseEngine(eph, t, self.eclipse_model)
+        sun_ecef = (eph['sun'] - eph['earth']).at(t).frame_xyz(itrs).km.T
+        sun = open_array('sun.npy', np.float32, (n_steps, 3))
+        sun[:] = sun_ecef / np.linalg.norm(sun_ecef, axis=1)[:, np.newaxis]
+
+        for j, satellite in enumerate(satellites):
+            geocentric = satellite.at(t)
+            xyz = geocentric.frame_xyz(itrs).km
+            # SGP4 อาจคืน nan เมื่อวงโคจรเสื่อมสภาพ ให้ถือว่าอยู่ใต้พื้นโลก
+            positions[:, j, :] = np.nan_to_num(xyz.T)
+            sunlit[:, j] = eclipse_engine.sunlit(np.nan_to_num(geocentric.position.km))
+
+        # sky-cell index ต่อ time step
+        order = open_array('order.npy', np.int32, (n_steps, n_sats))
+        cell_start = open_array('cell_start.npy', np.int32, (n_steps, self.n_cells + 1))
+        cell_radius = open_array('cell_radius.npy', np.float32, (n_steps, self.n_cells))
+        cell_edges = np.arange(self.n_cells + 1)
+
+        for k in range(n_steps):
+            step_positions = np.asarray(positions[k])
+            cells = self._cell_ids(step_positions)
+            step_order = np.argsort(cells, kind='stable')
+            order[k] = step_order
+            cell_start[k] = np.searchsorted(cells[step_order], cell_edges)
+
+            radius = np.zeros(self.n_cells, dtype=np.float32)
+            np.maximum.at(radius, cells, np.linalg.norm(step_positions, axis=1))
+            cell_radius[k] = radius
+
+        for array in (positions, sunlit, sun, order, cell_start, cell_radius):
+            array.flush()
+
+        metadata = {
+            'build': build_name,
+            'grid_start_utc': start_utc.isoformat(),
+            'grid_step_seconds': self.grid_step_seconds,
+            'grid_steps': n_steps,
+            'cell_size_degrees': self.cell_size_degrees,
+            'eclipse_model': self.eclipse_model,
+            'catalog_updated': catalog_updated,
+            'built_at': datetime.utcnow().replace(tzinfo=pytz.UTC).isoformat(),
+            'satellites': entries
+        }
+        with open(os.path.join(build_dir, 'metadata.json'), 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False)
+
+        # สลับไปใช้ build ใหม่แบบ atomic แล้วลบ build เก่า
+        pointer_tmp = os.path.join(self.index_dir, 'current.json.tmp')
+        with open(pointer_tmp, 'w', encoding='utf-8') as f:
+            json.dump({'build': build_name}, f)
+        os.replace(pointer_tmp, os.path.join(self.index_dir, 'current.json'))
+
+        for name in os.listdir(self.index_dir):
+            if name.startswith('build-') and name != build_name:
+                shutil.rmtree(os.path.join(self.index_dir, name), ignore_errors=True)
+
+        self.metadata = None
+        self.arrays = {}
+        return metadata
+
+    # ------------------------
+    # Refresh schedule
+    # ------------------------
+    def needs_refresh(self, now_utc=None):
+        """ต้องสร้างใหม่หรือไม่: ยังไม่มี index, grid ใกล้หมด หรือ catalog มี TLE ใหม่กว่า"""
+        if not self.load():
+            return True
+
+        now_utc = now_utc or datetime.utcnow().replace(tzinfo=pytz.UTC)
+        grid_end = self.grid_start + timedelta(seconds=self.metadata['grid_step_seconds'] * (self.metadata['grid_steps'] - 1))
+        if grid_end - now_utc < timedelta(hours=self.min_remaining_hours):
+            return True
+
+        client, collection = self._connect()
+        try:
+            catalog_updated = self.latest_catalog_update(collection)
+        finally:
+            client.close()
+
+        return catalog_updated is not None and catalog_updated != self.metadata.get('catalog_updated')
+
+    def refresh(self):
+        if self.needs_refresh():
+            return self.build()
+        return None
+
+    # ------------------------
+    # Query
+    # ------------------------
+    def load(self):
+        """เปิด index ปัจจุบันแบบ memory-mapped (read only)"""
+        if self.metadata is not None:
+            return True
+
+        pointer = os.path.join(self.index_dir, 'current.json')
+        if not os.path.exists(pointer):
+            return False
+
+        with open(pointer, encoding='utf-8') as f:
+            build_dir = os.path.join(self.index_dir, json.load(f)['build'])
+        with open(os.path.join(build_dir, 'metadata.json'), encoding='utf-8') as f:
+            self.metadata = json.load(f)
+
+        for name in ('positions', 'sunlit', 'sun', 'order', 'cell_start', 'cell_radius'):
+            self.arrays[name] = np.load(os.path.join(build_dir, name + '.npy'), mmap_mode='r')
+
+        self.grid_start = datetime.fromisoformat(self.metadata['grid_start_utc'])
+        self.cell_size_degrees = self.metadata['cell_size_degrees']
+        self.n_lat_cells = int(round(180 / self.cell_size_degrees))
+        self.n_lon_cells = int(round(360 / self.cell_size_degrees))
+        self.n_cells = self.n_lat_cells * self.n_lon_cells
+
+        # unit vector ของจุดศูนย์กลาง cell และรัศมีเชิงมุมของ cell (ครึ่งเส้นทแยง)
+        lat_c = np.radians(-90 + (np.arange(self.n_lat_cells) + 0.5) * self.cell_size_degrees)
+        lon_c = np.radians(-180 + (np.arange(self.n_lon_cells) + 0.5) * self.cell_size_degrees)
+        lat_grid, lon_grid = np.meshgrid(lat_c, lon_c, indexing='ij')
+        self.cell_centers = np.stack([
+            np.cos(lat_grid) * np.cos(lon_grid),
+            np.cos(lat_grid) * np.sin(lon_grid),
+            np.sin(lat_grid)
+        ], axis=-1).reshape(-1, 3)
+        self.cell_half_diagonal = np.radians(self.cell_size_degrees) * np.sqrt(2) / 2
+        return True
+
+    def step_index(self, when_utc):
+        offset = (when_utc - self.grid_start).total_seconds()
+        k = int(round(offset / self.metadata['grid_step_seconds']))
+        if k < 0 or k >= self.metadata['grid_steps']:
+            return None
+        return k
+
+    def _visible_at_step(self, k, observer_xyz, observer_up):
+        positions = self.arrays['positions']
+        order = self.arrays['order'][k]
+        cell_start = self.arrays['cell_start'][k]
+        cell_radius = np.asarray(self.arrays['cell_radius'][k])
+
+        # มุมที่กว้างที่สุดบนผิวโลกที่ยังมองเห็นวัตถุรัศมี r ได้: arccos(R / r)
+        occupied = cell_radius > EARTH_RADIUS_KM
+        horizon_angle = np.zeros(self.n_cells)
+        horizon_angle[occupied] = np.arccos(EARTH_RADIUS_KM / cell_radius[occupied])
+
+        observer_dir = observer_xyz / np.linalg.norm(observer_xyz)
+        cell_angle = np.arccos(np.clip(self.cell_centers @ observer_dir, -1.0, 1.0))
+        # เผื่อ 1° สำหรับความต่างระหว่าง geodetic และ geocentric
+        candidate_cells = np.flatnonzero(occupied & (cell_angle <= horizon_angle + self.cell_half_diagonal + np.radians(1.0)))
+
+        if len(candidate_cells) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        candidates = np.concatenate([order[cell_start[c]:cell_start[c + 1]] for c in candidate_cells])
+        candidates.sort()
+
+        # ตรวจ elevation จริงของ candidates
+        relative = np.asarray(positions[k, candidates], dtype=float) - observer_xyz
+        sin_elevation = (relative @ observer_up) / np.linalg.norm(relative, axis=1)
+        elevation = np.degrees(np.arcsin(np.clip(sin_elevation, -1.0, 1.0)))
+
+        above = elevation > self.min_elevation_angle
+        sunlit = np.asarray(self.arrays['sunlit'][k, candidates])
+        keep = above & sunlit
+        return candidates[keep], elevation[keep]
+
+    def query(self, lat, lon, start_utc=None, end_utc=None):
+        """
+        ดาวเทียมที่อยู่เหนือขอบฟ้าและได้รับแสงอาทิตย์
+        - ไม่ระบุ end_utc: ณ เวลา start_utc (ค่าเริ่มต้นคือปัจจุบัน)
+        - ระบุ end_utc: ทุก time step ในช่วง พร้อมเวลาที่ elevation สูงสุดของแต่ละดวง
+        """
+        if not self.load():
+            raise RuntimeError("Overhead index has not been built yet")
+
+        start_utc = start_utc or datetime.utcnow().replace(tzinfo=pytz.UTC)
+        end_utc = end_utc or start_utc
+
+        observer = wgs84.latlon(lat, lon)
+        observer_xyz = np.asarray(observer.itrs_xyz.km, dtype=float)
+        lat_r, lon_r = np.radians(lat), np.radians(lon)
+        observer_up = np.array([np.cos(lat_r) * np.cos(lon_r), np.cos(lat_r) * np.sin(lon_r), np.sin(lat_r)])
+
+        first_step = self.step_index(start_utc)
+        last_step = self.step_index(end_utc)
+        if first_step is None or last_step is None:
+            raise ValueError("Requested time is outside the precomputed grid")
+
+        step_seconds = self.metadata['grid_step_seconds']
+        best = {}
+        for k in range(first_step, last_step + 1):
+            indices, elevations = self._visible_at_step(k, observer_xyz, observer_up)
+            sun_elevation = float(np.degrees(np.arcsin(np.clip(np.asarray(self.arrays['sun'][k]) @ observer_up, -1.0, 1.0))))
+            for index, elevation in zip(indices.tolist(), elevations.tolist()):
+                if index not in best or elevation > best[index]['elevation']:
+                    best[index] = {'step': k, 'elevation': elevation, 'sun_elevation': sun_elevation}
+
+        results = []
+        for index, data in sorted(best.items(), key=lambda item: item[1]['elevation'], reverse=True):
+            entry = self.metadata['satellites'][index]
+            when = self.grid_start + timedelta(seconds=data['step'] * step_seconds)
+            results.append({
+                'name': entry['name'],
+                'norad_id': entry['norad_id'],
+                'elevation': round(data['elevation'], 2),
+                'time_utc': when.strftime("%Y-%m-%d %H:%M:%S UTC"),
+                'sun_elevation': round(data['sun_elevation'], 2)
+            })
+        return results
+
+
+def parse_utc(value):
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=pytz.UTC)
+    return parsed.astimezone(pytz.UTC)
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else 'query'
+    mongo_uri = os.getenv('MONGO_URI', 'mongodb://localhost:27017')
+    index = OverheadIndex(mongo_uri=mongo_uri)
+
+    if command == 'build':
+        metadata = index.build()
+        print(json.dumps({'success': True, 'build': metadata['build'], 'satellites': len(metadata['satellites'])}))
+    elif command == 'refresh':
+        metadata = index.refresh()
+        print(json.dumps({'success': True, 'rebuilt': metadata is not None}))
+    elif command == 'query':
+        input_data = json.load(sys.stdin)
+        results = index.query(
+            float(input_data['lat']),
+            float(input_data['lon']),
+            parse_utc(input_data.get('start')),
+            parse_utc(input_data.get('end'))
+        )
+        print(json.dumps({'success': True, 'count': len(results), 'satellites': results}, ensure_ascii=False, indent=2))
+    else:
+        print(f"Unknown command: {command}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
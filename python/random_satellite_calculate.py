@@ -1,31 +1,158 @@
 import sys
 import json
+import math
+import time
 from datetime import datetime, timedelta
 import pytz
-from skyfield.api import load, EarthSatellite, wgs84, Topos
+from skyfield.api import load, EarthSatellite, wgs84
 import random
 from pymongo import MongoClient
 import os
 import traceback
 import numpy as np
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import warnings
+from eclipse import EclipseEngine, SHADOW_MODELS, DEFAULT_SHADOW_MODEL, EARTH_RADIUS_KM
+from nightly_pass_table import NightlyPassTable
+from solar import SunModel, ACCURACY_TIERS, DEFAULT_ACCURACY, accuracy_info
+from time_grid import utc_grid, to_skyfield_time, to_utc_datetime, format_utc, LocalTimeZone
 warnings.filterwarnings('ignore')
 
+
+def find_pass_ranges(visible):
+    """แปลง boolean mask ของการมองเห็นเป็นช่วง index ของแต่ละ pass: array shape (P, 2) [start, stop)"""
+    padded = np.concatenate(([0], np.asarray(visible, dtype=np.int8), [0]))
+    edges = np.diff(padded)
+    starts = np.flatnonzero(edges == 1)
+    stops = np.flatnonzero(edges == -1)
+    return np.column_stack((starts, stops))
+
+
+def result_rank_key(result):
+    """ลำดับสุดท้ายของผลลัพธ์: จำนวน pass แล้วจึง elevation สูงสุด"""
+    return (result.total_passes, result.best_elevation)
+
+
+class ObservationGrid:
+    """
+    time grid ของช่วงสังเกต เก็บเป็น array (epoch seconds) และใช้ร่วมกันทุกดาวเทียมใน batch
+    เวลาท้องถิ่นแปลงผ่าน LocalTimeZone ของช่วงเวลานั้น และจัดรูปแบบเป็นช่วง index
+    """
+    __slots__ = ('t', 'epochs', 'sun_elevation', 'local_zone')
+
+    def __init__(self, t, epochs, sun_elevation, local_zone):
+        self.t = t
+        self.epochs = epochs
+        self.sun_elevation = sun_elevation
+        self.local_zone = local_zone
+
+    def __len__(self):
+        return len(self.epochs)
+
+    def format_local(self, start, stop):
+        return self.local_zone.format(self.epochs[start:stop])
+
+    def format_utc(self, start, stop):
+        return format_utc(self.epochs[start:stop])
+
+
+class SatelliteVisibilityResult:
+    """
+    ผลการมองเห็นของดาวเทียม 1 ดวง
+    เก็บ elevation/azimuth/range เป็น array ตาม time grid และเก็บ pass เป็นช่วง index
+    รายการจุดของแต่ละ pass สร้างเฉพาะเมื่อเรียก passes()
+    """
+    __slots__ = ('satellite', 'grid', 'elevation', 'azimuth', 'range_km', 'sunlit', 'pass_ranges', 'best_index')
+
+    def __init__(self, satellite, grid, elevation, azimuth, range_km, sunlit, pass_ranges, best_index):
+        self.satellite = satellite
+        self.grid = grid
+        self.elevation = elevation
+        self.azimuth = azimuth
+        self.range_km = range_km
+        self.sunlit = sunlit
+        self.pass_ranges = pass_ranges
+        self.best_index = best_index
+
+    @property
+    def total_passes(self):
+        return len(self.pass_ranges)
+
+    @property
+    def best_pass_length(self):
+        for start, stop in self.pass_ranges:
+            if start <= self.best_index < stop:
+                return int(stop - start)
+        return 0
+
+    @property
+    def best_elevation(self):
+        return float(self.elevation[self.best_index])
+
+    @property
+    def best_azimuth(self):
+        return float(self.azimuth[self.best_index])
+
+    @property
+    def best_range_km(self):
+        return float(self.range_km[self.best_index])
+
+    @property
+    def sun_elevation(self):
+        return float(self.grid.sun_elevation[self.best_index])
+
+    @property
+    def is_sunlit(self):
+        return bool(self.sunlit[self.best_index])
+
+    def passes(self):
+        """สร้างรายการจุดของทุก pass (ใช้เมื่อต้องการข้อมูลเต็มเท่านั้น)"""
+        all_passes = []
+        for start, stop in self.pass_ranges:
+            # จัดรูปแบบเวลาของทั้ง pass ในครั้งเดียว
+            local_times = self.grid.format_local(start, stop)
+            utc_times = self.grid.format_utc(start, stop)
+            all_passes.append([
+                {
+                    'time_local': local_times[i - start],
+                    'time_utc': utc_times[i - start],
+                    'elevation': float(self.elevation[i]),
+                    'azimuth': float(self.azimuth[i]),
+                    'range_km': float(self.range_km[i]),
+                    'sun_elevation': float(self.grid.sun_elevation[i]),
+                    'is_sunlit': bool(self.sunlit[i]),
+                    'is_visible': True
+                }
+                for i in range(start, stop)
+            ])
+        return all_passes
+
+
 class StandardSatelliteVisibilityCalculator:
-    def __init__(self, mongo_uri='mongodb://localhost:27017'):
+    def __init__(self, mongo_uri='mongodb://localhost:27017', eclipse_model=DEFAULT_SHADOW_MODEL, accuracy=DEFAULT_ACCURACY):
         self.ts = load.timescale()
         self.batch_size = 100 
         self.target_count = 5
         self.max_iterations = 10
-        self.chunk_size = 25
         self.max_workers = 4
+        self.max_in_flight = self.max_workers * 2
+        
+        # ประเมินทั้ง batch เสมอ (ผลลัพธ์ไม่ขึ้นกับลำดับการประเมิน)
+        # หยุดก่อนเฉพาะเมื่อใช้เวลาเกิน time_budget_seconds (คืนค่าที่ดีที่สุดที่หาได้)
+        self.time_budget_seconds = 20.0
         
         self.min_elevation_angle = 0.0 
         self.max_sun_elevation = -12.0
         self.time_resolution_minutes = 5
+        self.eclipse_model = eclipse_model if eclipse_model in SHADOW_MODELS else DEFAULT_SHADOW_MODEL
         
         self.eph = load('de440.bsp')
+        self.accuracy = accuracy if accuracy in ACCURACY_TIERS else DEFAULT_ACCURACY
+        self.sun_model = SunModel(self.eph, self.accuracy)
+        
+        # ตาราง pass ที่คำนวณล่วงหน้าทุกคืน (ถ้ามี) ใช้เลือก candidates แทนการสุ่ม
+        self.pass_table = NightlyPassTable.open_if_available()
+        self.pass_table_used = False
 
         try:
             self.client = MongoClient(mongo_uri)
@@ -63,26 +190,63 @@ class StandardSatelliteVisibilityCalculator:
         pipeline = [{"$match": base_query}, {"$sample": {"size": self.batch_size}}]
         results = list(self.collection.aggregate(pipeline))
         
-        satellites = []
-        for doc in results:
-            satellites.append({
-                'id': str(doc.get('_id', '')),
-                'name': doc.get('OBJECT_NAME', 'Unknown'),
-                'tle1': doc.get('TLE_LINE1', ''),
-                'tle2': doc.get('TLE_LINE2', ''),
-                'norad_id': doc.get('NORAD_CAT_ID', ''),
-                'object_type': doc.get('OBJECT_TYPE', ''),
-                'country_code': doc.get('COUNTRY_CODE', '')
-            })
+        return [self.format_satellite_doc(doc) for doc in results]
+
+    def get_satellites_by_norad_ids(self, norad_ids):
+        """ดึงข้อมูล TLE ตาม NORAD IDs (ใช้กับ candidates จาก nightly pass table) เรียงตามลำดับของ norad_ids"""
+        if self.collection is None or not norad_ids:
+            return []
+        
+        query = {
+            "NORAD_CAT_ID": {"$in": list(norad_ids)},
+            "TLE_LINE1": {"$exists": True, "$ne": ""},
+            "TLE_LINE2": {"$exists": True, "$ne": ""},
+            "OBJECT_NAME": {"$exists": True, "$ne": ""}
+        }
+        satellites = [self.format_satellite_doc(doc) for doc in self.collection.find(query)]
+        
+        # $in ไม่รับประกันลำดับ: เรียงกลับตามลำดับ peak elevation ของ pass table
+        rank = {str(norad_id): i for i, norad_id in enumerate(norad_ids)}
+        satellites.sort(key=lambda sat: rank.get(str(sat['norad_id']), len(rank)))
         return satellites
 
+    def format_satellite_doc(self, doc):
+        return {
+            'id': str(doc.get('_id', '')),
+            'name': doc.get('OBJECT_NAME', 'Unknown'),
+            'tle1': doc.get('TLE_LINE1', ''),
+            'tle2': doc.get('TLE_LINE2', ''),
+            'norad_id': doc.get('NORAD_CAT_ID', ''),
+            'object_type': doc.get('OBJECT_TYPE', ''),
+            'country_code': doc.get('COUNTRY_CODE', '')
+        }
+
+    def get_pass_table_candidates(self, observer_lat, observer_lon, grid):
+        """
+        candidates จาก nightly pass table ของ cell/site ที่ผู้สังเกตอยู่ (batch_size ดวงที่ peak elevation สูงสุด)
+        คืนค่า [] ถ้าไม่มีตาราง หรือตารางไม่ครอบคลุมช่วงเวลานี้
+        """
+        if self.pass_table is None:
+            return []
+        
+        try:
+            norad_ids = self.pass_table.candidate_norad_ids(
+                observer_lat, observer_lon, to_utc_datetime(grid.epochs[0]), to_utc_datetime(grid.epochs[-1])
+            )
+        except Exception:
+            return []
+        
+        if not norad_ids:
+            return []
+        # ตารางเรียงตาม peak elevation แล้ว
+        return norad_ids[:self.batch_size]
+
     def calculate_observation_window(self, observer_lat, observer_lon, target_date, timezone_str, time_mode='auto', start_time=None, end_time=None):
         """
         คำนวณช่วงเวลาสำหรับการสังเกตดาวเทียม
         """
         local_tz = pytz.timezone(timezone_str)
         target_datetime = datetime.strptime(target_date, '%Y-%m-%d')
-        observer = Topos(latitude_degrees=observer_lat, longitude_degrees=observer_lon)
         
         if time_mode == 'custom' and start_time and end_time:
             # Custom Time Mode: ใช้เวลาที่ผู้ใช้กำหนด
@@ -95,73 +259,42 @@ class StandardSatelliteVisibilityCalculator:
             
             start_search = local_tz.localize(start_datetime)
             end_search = local_tz.localize(end_datetime)
-            
-            observation_times = []
-            current_time = start_search
-            
-            while current_time <= end_search:
-                t = self.ts.from_datetime(current_time.astimezone(pytz.UTC))
-                
-                # คำนวณมุมดวงอาทิตย์
-                astrometric = (self.eph['earth'] + observer).at(t).observe(self.eph['sun']).apparent()
-                sun_alt, sun_az, _ = astrometric.altaz()
-                sun_elevation = sun_alt.degrees
-                
-                observation_times.append({
-                    'time': t,
-                    'local_time': current_time,
-                    'sun_elevation': sun_elevation
-                })
-                
-                current_time += timedelta(minutes=self.time_resolution_minutes)
-            
-            optimal_periods = [(start_search, end_search)]
-            
         else:
             # Auto Night Mode: หาช่วงเวลาที่ sun ≤ -12° อัตโนมัติ
             start_search = local_tz.localize(target_datetime.replace(hour=0, minute=0, second=0))
             end_search = local_tz.localize(target_datetime.replace(hour=23, minute=59, second=59))
-            
-            observation_times = []
-            optimal_periods = []
-            
-            current_time = start_search
-            in_observation_window = False
-            window_start = None
-            
-            while current_time <= end_search:
-                t = self.ts.from_datetime(current_time.astimezone(pytz.UTC))
-                
-                # คำนวณมุมดวงอาทิตย์
-                astrometric = (self.eph['earth'] + observer).at(t).observe(self.eph['sun']).apparent()
-                sun_alt, sun_az, _ = astrometric.altaz()
-                sun_elevation = sun_alt.degrees
-                
-                # ตรวจสอบว่าอยู่ในช่วงเวลาที่เหมาะสม (sun ≤ -12°)
-                is_dark_enough = sun_elevation <= self.max_sun_elevation
-                
-                if is_dark_enough and not in_observation_window:
-                    in_observation_window = True
-                    window_start = current_time
-                elif not is_dark_enough and in_observation_window:
-                    in_observation_window = False
-                    if window_start:
-                        optimal_periods.append((window_start, current_time))
-                
-                if is_dark_enough:
-                    observation_times.append({
-                        'time': t,
-                        'local_time': current_time,
-                        'sun_elevation': sun_elevation
-                    })
-                
-                current_time += timedelta(minutes=self.time_resolution_minutes)
-            
-            # จบ loop แต่ยังอยู่ใน observation window
-            if in_observation_window and window_start:
-                optimal_periods.append((window_start, current_time))
         
-        return observation_times, optimal_periods
+        # time grid เป็น epoch seconds ทุก time_resolution_minutes
+        step_seconds = self.time_resolution_minutes * 60
+        epochs = utc_grid(start_search.timestamp(), end_search.timestamp(), step_seconds)
+        
+        if not len(epochs):
+            return None, []
+        
+        # คำนวณมุมดวงอาทิตย์ของทุก step ในครั้งเดียว
+        t_steps = to_skyfield_time(self.ts, epochs)
+        sun_elevations = self.sun_model.altitude_degrees(t_steps, observer_lat, observer_lon)
+        local_zone = LocalTimeZone(local_tz, epochs[0], epochs[-1])
+        
+        if time_mode == 'custom' and start_time and end_time:
+            optimal_periods = [(start_search, end_search)]
+            return ObservationGrid(t_steps, epochs, sun_elevations, local_zone), optimal_periods
+        
+        # ตรวจสอบว่าอยู่ในช่วงเวลาที่เหมาะสม (sun ≤ -12°)
+        is_dark_enough = sun_elevations <= self.max_sun_elevation
+        
+        # ช่วงมืดต่อเนื่อง: สิ้นสุดที่ step แรกที่สว่าง หรือ step ถัดจาก step สุดท้าย
+        optimal_periods = []
+        for start, stop in find_pass_ranges(is_dark_enough):
+            period_end = epochs[stop] if stop < len(epochs) else epochs[-1] + step_seconds
+            optimal_periods.append((local_zone.to_datetime(epochs[start]), local_zone.to_datetime(period_end)))
+        
+        if not is_dark_enough.any():
+            return None, optimal_periods
+        
+        dark_epochs = epochs[is_dark_enough]
+        grid = ObservationGrid(to_skyfield_time(self.ts, dark_epochs), dark_epochs, sun_elevations[is_dark_enough], local_zone)
+        return grid, optimal_periods
 
     def validate_tle_format(self, satellites_batch):
         """ตรวจสอบรูปแบบ TLE ตามมาตรฐาน"""
@@ -179,109 +312,52 @@ class StandardSatelliteVisibilityCalculator:
         
         return valid_satellites
 
-    def calculate_satellite_visibility_standard(self, satellite, sat_data, observer_lat, observer_lon, observation_times, time_mode='auto'):
+    def calculate_satellite_visibility_standard(self, satellite, sat_data, observer_lat, observer_lon, grid, eclipse_engine, time_mode='auto'):
         """
         คำนวณการมองเห็นดาวเทียม
         Auto Mode: elevation > 0°, satellite is sunlit (sun condition pre-filtered)
         Custom Mode: elevation > 0°, satellite is sunlit, และ sun ≤ -12°
         """
         observer_location = wgs84.latlon(observer_lat, observer_lon)
-        visible_passes = []
-        current_pass = []
         
         try:
-            for obs_data in observation_times:
-                t = obs_data['time']
-                sun_elevation = obs_data['sun_elevation']
-                local_time = obs_data['local_time']
-                
-                # คำนวณตำแหน่งดาวเทียมเทียบกับผู้สังเกต
-                difference = satellite - observer_location
-                topocentric = difference.at(t)
-                
-                alt, az, distance = topocentric.altaz()
-                elevation_angle = alt.degrees
-                azimuth_angle = az.degrees
-                range_km = distance.km
-                
-                # ตรวจสอบการส่องแสงของดาวเทียม
-                is_sunlit = bool(satellite.at(t).is_sunlit(self.eph))
-                
-                # เงื่อนไขการมองเห็นตาม mode
-                if time_mode == 'auto':
-                    # Auto Night Mode: elevation > 0° และ satellite is sunlit
-                    # (sun condition ถูกกรองไว้แล้วในขั้นตอน calculate_observation_window)
-                    is_visible = (elevation_angle >= self.min_elevation_angle and is_sunlit)
-                else:
-                    # Custom Time Mode: elevation > 0°, satellite is sunlit, และ sun ≤ -12°
-                    is_visible = (elevation_angle >= self.min_elevation_angle and 
-                                is_sunlit and 
-                                sun_elevation <= self.max_sun_elevation)
-                
-                observation_point = {
-                    'time': t,
-                    'local_time': local_time,
-                    'elevation': elevation_angle,
-                    'azimuth': azimuth_angle,
-                    'range_km': range_km,
-                    'sun_elevation': sun_elevation,
-                    'is_sunlit': is_sunlit,
-                    'is_visible': is_visible
-                }
-                
-                if is_visible:
-                    current_pass.append(observation_point)
-                else:
-                    if current_pass:
-                        visible_passes.append(current_pass.copy())
-                        current_pass = []
+            # คำนวณตำแหน่งดาวเทียมเทียบกับผู้สังเกตตลอดทั้ง time grid ในครั้งเดียว
+            difference = satellite - observer_location
+            alt, az, distance = difference.at(grid.t).altaz()
+            elevation_angles = alt.degrees
             
-            # เก็บ pass สุดท้าย
-            if current_pass:
-                visible_passes.append(current_pass)
+            # ตรวจสอบการส่องแสงของดาวเทียม (ใช้ตำแหน่งดวงอาทิตย์ร่วมกันทุกดวง)
+            sunlit_flags = eclipse_engine.sunlit(satellite.at(grid.t).position.km)
             
-            # คัดเลือก pass ที่ดีที่สุด
-            if visible_passes:
-                best_pass = max(visible_passes, 
-                               key=lambda p: max(point['elevation'] for point in p))
-                
-                best_point = max(best_pass, key=lambda p: p['elevation'])
-                
-                return {
-                    'satellite': sat_data,
-                    'total_passes': len(visible_passes),
-                    'best_pass_length': len(best_pass),
-                    'best_elevation': best_point['elevation'],
-                    'best_azimuth': best_point['azimuth'],
-                    'best_range_km': best_point['range_km'],
-                    'best_observation_time_local': best_point['local_time'],
-                    'best_observation_time_utc': best_point['time'].utc_datetime(),
-                    'sun_elevation': best_point['sun_elevation'],
-                    'is_sunlit': best_point['is_sunlit'],
-                    'all_passes': visible_passes
-                }
+            # เงื่อนไขการมองเห็นตาม mode
+            visible = (elevation_angles >= self.min_elevation_angle) & sunlit_flags
+            if time_mode != 'auto':
+                # Custom Time Mode: elevation > 0°, satellite is sunlit, และ sun ≤ -12°
+                # (Auto Night Mode กรอง sun condition ไว้แล้วใน calculate_observation_window)
+                visible &= grid.sun_elevation <= self.max_sun_elevation
             
-        except Exception:
-            pass
-        
-        return None
-
-    def process_satellite_chunk_standard(self, chunk_data):
-        """ประมวลผล chunk"""
-        satellite_pairs, observer_lat, observer_lon, observation_times, time_mode = chunk_data
-        results = []
-        
-        for satellite_pair in satellite_pairs:
-            satellite, sat_data = satellite_pair
+            if not visible.any():
+                return None
+            
+            # pass เก็บเป็นช่วง index, จุดที่ดีที่สุดคือจุดที่ elevation สูงสุดในบรรดาจุดที่มองเห็น
+            pass_ranges = find_pass_ranges(visible)
+            best_index = int(np.argmax(np.where(visible, elevation_angles, -np.inf)))
             
-            result = self.calculate_satellite_visibility_standard(
-                satellite, sat_data, observer_lat, observer_lon, observation_times, time_mode
+            return SatelliteVisibilityResult(
+                satellite=sat_data,
+                grid=grid,
+                elevation=elevation_angles,
+                azimuth=az.degrees,
+                range_km=distance.km,
+                sunlit=sunlit_flags,
+                pass_ranges=pass_ranges,
+                best_index=best_index
             )
             
-            if result:
-                results.append(result)
+        except Exception:
+            pass
         
-        return results
+        return None
 
     def create_satellite_objects_batch(self, valid_satellites):
         """สร้าง EarthSatellite objects แบบ batch"""
@@ -301,54 +377,81 @@ class StandardSatelliteVisibilityCalculator:
         
         return satellite_pairs
 
-    def find_visible_satellites_standard_method(self, satellites_batch, observer_lat, observer_lon, target_date, timezone_str, time_mode='auto', start_time=None, end_time=None):
-        """หาดาวเทียมที่มองเห็นได้"""
-        # คำนวณช่วงเวลาการสังเกต
-        observation_times, optimal_periods = self.calculate_observation_window(
-            observer_lat, observer_lon, target_date, timezone_str, time_mode, start_time, end_time
-        )
+    def can_rise_above_horizon(self, satellite, observer_lat):
+        """
+        คัดกรองเบื้องต้นจาก orbital elements (ไม่ต้อง propagate)
+        คืนค่า False ถ้าดาวเทียมไม่มีทางขึ้นเหนือขอบฟ้าของผู้สังเกต
+        """
+        model = satellite.model
+        mean_motion_rad_s = model.no_kozai / 60.0
+        if mean_motion_rad_s <= 0:
+            return False
         
-        if not observation_times:
-            return []
+        semi_major_axis_km = (398600.4418 / mean_motion_rad_s ** 2) ** (1.0 / 3.0)
+        apogee_km = semi_major_axis_km * (1 + model.ecco)
+        perigee_km = semi_major_axis_km * (1 - model.ecco)
+        if perigee_km <= EARTH_RADIUS_KM:
+            return False
         
-        # กรอง TLE ที่ถูกต้อง
-        valid_satellites = self.validate_tle_format(satellites_batch)
-        if not valid_satellites:
-            return []
+        # ละติจูดสูงสุดของ sub-satellite point + มุมที่มองเห็นได้จากขอบฟ้า
+        inclination = math.degrees(model.inclo)
+        max_latitude = min(inclination, 180.0 - inclination)
+        horizon_angle = math.degrees(math.acos(EARTH_RADIUS_KM / apogee_km))
+        return abs(observer_lat) <= max_latitude + horizon_angle
+
+    def screen_satellites(self, satellite_pairs, observer_lat):
+        """ตัดดวงที่ไม่มีทางมองเห็นออก โดยคงลำดับเดิม (เช่นลำดับ peak elevation ของ pass table)"""
+        screened = []
+        for satellite, sat_data in satellite_pairs:
+            try:
+                if self.can_rise_above_horizon(satellite, observer_lat):
+                    screened.append((satellite, sat_data))
+            except Exception:
+                continue
+        return screened
+
+    def evaluate_satellites_streaming(self, executor, satellite_pairs, observer_lat, observer_lon, grid, eclipse_engine, time_mode, deadline, qualified):
+        """
+        ประเมินดาวเทียมทีละดวงตามลำดับที่ส่งมา (มีงานค้างไม่เกิน max_in_flight)
+        เพิ่มผลลงใน qualified และยกเลิกงานที่เหลือทันทีเมื่อหมดเวลา
+        """
+        remaining_pairs = iter(satellite_pairs)
+        pending = set()
         
-        # สร้าง satellite objects
-        satellite_pairs = self.create_satellite_objects_batch(valid_satellites)
-        if not satellite_pairs:
-            return []
+        def submit_next():
+            pair = next(remaining_pairs, None)
+            if pair is None:
+                return
+            satellite, sat_data = pair
+            pending.add(executor.submit(
+                self.calculate_satellite_visibility_standard,
+                satellite, sat_data, observer_lat, observer_lon, grid, eclipse_engine, time_mode
+            ))
+        
+        for _ in range(self.max_in_flight):
+            submit_next()
         
-        # แบ่งเป็น chunks สำหรับ parallel processing
-        chunks = []
-        for i in range(0, len(satellite_pairs), self.chunk_size):
-            chunk_pairs = satellite_pairs[i:i+self.chunk_size]
-            chunks.append((chunk_pairs, observer_lat, observer_lon, observation_times, time_mode))
-        
-        # ประมวลผล parallel
-        all_results = []
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_chunk = {
-                executor.submit(self.process_satellite_chunk_standard, chunk): i 
-                for i, chunk in enumerate(chunks)
-            }
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
             
-            for future in as_completed(future_to_chunk):
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
                 try:
-                    chunk_results = future.result()
-                    all_results.extend(chunk_results)
+                    result = future.result()
                 except Exception:
-                    pass
+                    result = None
+                if result:
+                    qualified.append(result)
+                submit_next()
         
-        # เรียงลำดับตามคุณภาพ
-        all_results.sort(key=lambda x: (x['total_passes'], x['best_elevation']), reverse=True)
-        
-        return all_results
+        for future in pending:
+            future.cancel()
 
     def find_qualified_satellites_vectorized(self, observer_lat, observer_lon, target_date, timezone_str, time_mode='auto', start_time=None, end_time=None):
         """หาดาวเทียมที่เหมาะสม"""
+        deadline = time.monotonic() + self.time_budget_seconds
         qualified = []
         excluded_ids = set()
         iteration = 0
@@ -356,54 +459,101 @@ class StandardSatelliteVisibilityCalculator:
         
         if total_satellites == 0:
             return []
-
-        while len(qualified) < self.target_count and iteration < self.max_iterations:
-            iteration += 1
-            
-            # ดึงข้อมูล batch
-            batch = self.get_random_satellites_batch(exclude_ids=list(excluded_ids))
-            if not batch:
-                break
-            
-            # เพิ่ม IDs ไปยัง excluded set
-            for sat in batch:
-                excluded_ids.add(sat['id'])
-            
-            # คำนวณหาดาวเทียมที่เหมาะสม
-            batch_results = self.find_visible_satellites_standard_method(
-                batch, observer_lat, observer_lon, target_date, timezone_str, time_mode, start_time, end_time
-            )
-            
-            qualified.extend(batch_results)
+        
+        # คำนวณช่วงเวลาการสังเกต, time grid และตำแหน่งดวงอาทิตย์ครั้งเดียว ใช้ร่วมกันทุก batch
+        grid, optimal_periods = self.calculate_observation_window(
+            observer_lat, observer_lon, target_date, timezone_str, time_mode, start_time, end_time
+        )
+        
+        if not grid:
+            return []
+        
+        eclipse_engine = EclipseEngine(self.eph, grid.t, self.eclipse_model, self.sun_model)
+        
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            # ใช้ nightly pass table ก่อน: คำนวณละเอียดเฉพาะดาวเทียมที่มี pass ใน cell นี้
+            candidate_ids = self.get_pass_table_candidates(observer_lat, observer_lon, grid)
+            if candidate_ids:
+                batch = self.get_satellites_by_norad_ids(candidate_ids)
+                for sat in batch:
+                    excluded_ids.add(sat['id'])
+                
+                satellite_pairs = self.create_satellite_objects_batch(self.validate_tle_format(batch))
+                satellite_pairs = self.screen_satellites(satellite_pairs, observer_lat)
+                self.evaluate_satellites_streaming(
+                    executor, satellite_pairs, observer_lat, observer_lon, grid, eclipse_engine, time_mode, deadline, qualified
+                )
+                # ระบุแหล่งที่มาเฉพาะเมื่อ candidates จากตารางให้ผลลัพธ์จริง
+                self.pass_table_used = bool(qualified)
             
-            # หยุดถ้าได้เพียงพอ
-            if len(qualified) >= self.target_count:
-                break
+            # สุ่มจาก catalog ถ้ายังได้ไม่ครบ (หรือไม่มี pass table)
+            while (len(qualified) < self.target_count
+                   and iteration < self.max_iterations
+                   and time.monotonic() < deadline):
+                iteration += 1
                 
-            # หยุดถ้าตรวจสอบครบทุกดวง
-            if len(excluded_ids) >= total_satellites:
-                break
-
+                # ดึงข้อมูล batch
+                batch = self.get_random_satellites_batch(exclude_ids=list(excluded_ids))
+                if not batch:
+                    break
+                
+                # เพิ่ม IDs ไปยัง excluded set
+                for sat in batch:
+                    excluded_ids.add(sat['id'])
+                
+                # กรอง TLE, สร้าง satellite objects และตัดดวงที่ไม่มีทางมองเห็นออก
+                valid_satellites = self.validate_tle_format(batch)
+                satellite_pairs = self.create_satellite_objects_batch(valid_satellites)
+                satellite_pairs = self.screen_satellites(satellite_pairs, observer_lat)
+                
+                self.evaluate_satellites_streaming(
+                    executor, satellite_pairs, observer_lat, observer_lon, grid, eclipse_engine, time_mode, deadline, qualified
+                )
+                
+                # หยุดถ้าได้จำนวนขั้นต่ำแล้ว (ไม่สุ่ม batch ใหม่เพิ่ม)
+                if len(qualified) >= self.target_count:
+                    break
+                
+                # หยุดถ้าตรวจสอบครบทุกดวง
+                if len(excluded_ids) >= total_satellites:
+                    break
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
         # เลือกดาวเทียมที่ดีที่สุด
-        if len(qualified) > self.target_count:
-            qualified = qualified[:self.target_count]
-            
-        return qualified
+        qualified.sort(key=result_rank_key, reverse=True)
+        return qualified[:self.target_count]
+
+    def format_passes_for_web_display(self, result):
+        """แปลงรายการจุดของทุก pass เป็น JSON (สร้างเฉพาะเมื่อ include_passes)"""
+        passes_data = []
+        for visible_pass in result.passes():
+            passes_data.append([
+                {
+                    'time_local': point['time_local'],
+                    'time_utc': point['time_utc'],
+                    'elevation': round(point['elevation'], 2),
+                    'azimuth': round(point['azimuth'], 2),
+                    'range_km': round(point['range_km'], 3),
+                    'sun_elevation': round(point['sun_elevation'], 2),
+                    'is_sunlit': point['is_sunlit']
+                }
+                for point in visible_pass
+            ])
+        return passes_data
 
-    def format_for_web_display(self, qualified_satellites, observer_lat, observer_lon, target_date, timezone_str, time_mode='auto', start_time=None, end_time=None):
+    def format_for_web_display(self, qualified_satellites, observer_lat, observer_lon, target_date, timezone_str, time_mode='auto', start_time=None, end_time=None, include_passes=False):
         """จัดรูปแบบข้อมูลสำหรับแสดงผล"""
         satellites_data = []
         
         for result in qualified_satellites:
-            sat = result['satellite']
-            local_tz = pytz.timezone(timezone_str)
+            sat = result.satellite
             
-            # แปลงเวลา UTC เป็น local time
-            utc_time = result['best_observation_time_utc']
-            if hasattr(utc_time, 'replace'):
-                local_time = utc_time.replace(tzinfo=pytz.UTC).astimezone(local_tz)
-            else:
-                local_time = result['best_observation_time_local']
+            # เวลาที่ดีที่สุด จัดรูปแบบจาก time grid ที่ใช้ร่วมกัน
+            best_index = result.best_index
+            local_time = result.grid.format_local(best_index, best_index + 1)[0]
+            utc_time = result.grid.format_utc(best_index, best_index + 1)[0]
             
             satellites_data.append({
                 'name': sat['name'],
@@ -412,16 +562,19 @@ class StandardSatelliteVisibilityCalculator:
                 'norad_id': sat.get('norad_id', ''),
                 'object_type': sat.get('object_type', ''),
                 'country_code': sat.get('country_code', ''),
-                'sun_elevation': round(result['sun_elevation'], 2),
-                'best_satellite_elevation': round(result['best_elevation'], 2),
-                'best_azimuth': round(result['best_azimuth'], 2),
-                'best_range_km': round(result['best_range_km'], 3),
-                'is_sunlit': result['is_sunlit'],
-                'total_passes': result['total_passes'],
-                'best_pass_duration_points': result['best_pass_length'],
-                'best_observation_time_local': local_time.strftime("%Y-%m-%d %H:%M:%S %Z") if hasattr(local_time, 'strftime') else str(local_time),
-                'best_observation_time_utc': utc_time.strftime("%Y-%m-%d %H:%M:%S UTC") if hasattr(utc_time, 'strftime') else str(utc_time)
+                'sun_elevation': round(result.sun_elevation, 2),
+                'best_satellite_elevation': round(result.best_elevation, 2),
+                'best_azimuth': round(result.best_azimuth, 2),
+                'best_range_km': round(result.best_range_km, 3),
+                'is_sunlit': result.is_sunlit,
+                'total_passes': result.total_passes,
+                'best_pass_duration_points': result.best_pass_length,
+                'best_observation_time_local': local_time,
+                'best_observation_time_utc': utc_time
             })
+            
+            if include_passes:
+                satellites_data[-1]['passes'] = self.format_passes_for_web_display(result)
 
         calculation_method = "Custom Time Range" if time_mode == 'custom' else "Auto Night Detection"
         
@@ -445,6 +598,10 @@ class StandardSatelliteVisibilityCalculator:
                 'min_elevation_angle': self.min_elevation_angle,
                 'max_sun_elevation': self.max_sun_elevation,
                 'time_resolution_minutes': self.time_resolution_minutes,
+                'time_budget_seconds': self.time_budget_seconds,
+                'candidate_source': 'nightly_pass_table' if self.pass_table_used else 'random_sample',
+                'eclipse_model': self.eclipse_model,
+                'accuracy': accuracy_info(self.accuracy),
                 'batch_size': self.batch_size,
                 'target_count': self.target_count,
                 'max_iterations': self.max_iterations
@@ -470,12 +627,15 @@ def main():
         time_mode = input_data.get('time_mode', 'auto')
         start_time = input_data.get('start_time', '')
         end_time = input_data.get('end_time', '')
+        include_passes = bool(input_data.get('include_passes', False))
+        eclipse_model = input_data.get('eclipse_model', DEFAULT_SHADOW_MODEL)
+        accuracy = input_data.get('accuracy', DEFAULT_ACCURACY)
         
         # ตรวจสอบ time mode
         if time_mode == 'custom' and not (start_time and end_time):
             time_mode = 'auto'  # fallback ถ้าไม่มีเวลากำหนด
 
-        calculator = StandardSatelliteVisibilityCalculator(mongo_uri=mongo_uri)
+        calculator = StandardSatelliteVisibilityCalculator(mongo_uri=mongo_uri, eclipse_model=eclipse_model, accuracy=accuracy)
         
         if calculator.collection is None:
             result = {'success': False, 'error': 'Database connection failed'}
@@ -485,7 +645,7 @@ def main():
                 latitude, longitude, target_date, timezone_str, time_mode, start_time, end_time
             )
             result = calculator.format_for_web_display(
-                qualified, latitude, longitude, target_date, timezone_str, time_mode, start_time, end_time
+                qualified, latitude, longitude, target_date, timezone_str, time_mode, start_time, end_time, include_passes
             )
 
         calculator.close_connection()
@@ -0,0 +1,327 @@
+"""
+Sun model สำหรับเกณฑ์ความมืด (sun ≤ -12°) และการตรวจ sunlit
+
+Accuracy tiers
+- 'standard': DE440 observe().apparent() (light-time, aberration, nutation)
+- 'fast': สูตรตำแหน่งดวงอาทิตย์ความแม่นยำต่ำของ Astronomical Almanac แบบ vectorized
+  ไม่มีการแก้ apparent place ความคลาดเคลื่อนสูงสุดตาม TIER_MAX_ERROR
+  (ใช้ได้ดีในช่วงปี 1950-2050)
+
+ตรวจ 'fast' เทียบกับ 'standard' ตลอด 1 ปี (ตำแหน่งดวงอาทิตย์ และผลลัพธ์ของ calculate.py /
+random_satellite_calculate.py กับชุด TLE คงที่) ออกด้วย exit code 1 ถ้าเกินเกณฑ์
+รันจาก root ของโปรเจกต์ (ที่มี de440.bsp):
+    npm run check:accuracy
+    python python/solar.py [year] [tle_file]
+"""
+import os
+import io
+import sys
+import json
+import runpy
+import contextlib
+from datetime import datetime, timedelta
+import numpy as np
+
+ACCURACY_TIERS = ('standard', 'fast')
+DEFAULT_ACCURACY = 'standard'
+
+AU_KM = 149597870.7
+
+# ความคลาดเคลื่อนสูงสุดที่คาดไว้เทียบกับ DE440 apparent place
+TIER_MAX_ERROR = {
+    'standard': {
+        'sun_altitude_degrees': 0.0,
+        'sun_direction_degrees': 0.0
+    },
+    'fast': {
+        'sun_altitude_degrees': 0.02,
+        'sun_direction_degrees': 0.02
+    }
+}
+
+# สัดส่วนผลลัพธ์ที่ยอมให้ต่างจาก 'standard' (นับโดย compare_tiers)
+# ค่าวัดปี 2026 ทุก 7 วัน: dark_minutes 1.1e-4, is_visible 5e-6, is_sunlit 3.2e-5,
+# dark_windows 4/251 (ขอบเลื่อน 1 step), selected_satellites 1/212
+TIER_MAX_OUTPUT_MISMATCH = {
+    'standard': {
+        'dark_minutes': 0.0,
+        'is_visible': 0.0,
+        'is_sunlit': 0.0,
+        'dark_windows': 0.0,
+        'selected_satellites': 0.0
+    },
+    'fast': {
+        'dark_minutes': 0.001,
+        'is_visible': 0.0001,
+        'is_sunlit': 0.0001,
+        'dark_windows': 0.05,
+        'selected_satellites': 0.02
+    }
+}
+
+# ชุดข้อมูลของ compare_tiers: observers ตัวอย่าง และวงโคจร LEO [inclination, mean motion (rev/day)]
+# แบบเดียวกับ loadtest/fixtures.js (ไม่มี drag เพื่อให้ propagate จาก epoch กลางปีได้ทั้งปี)
+COMPARISON_OBSERVERS = ((13.7563, 100.5018), (51.4779, 0.0), (-33.8688, 151.2093), (64.8378, -147.7164))
+COMPARISON_ORBITS = ((51.64, 15.50), (53.05, 15.06), (97.50, 15.20), (86.40, 14.34), (70.00, 13.80))
+COMPARISON_MONGO_URI = 'mongodb://localhost:27017/?serverSelectionTimeoutMS=1000'
+
+
+def accuracy_info(accuracy):
+    """ข้อมูล tier สำหรับใส่ใน response"""
+    return {'tier': accuracy, **{f'max_{key}_error': value for key, value in TIER_MAX_ERROR[accuracy].items()}}
+
+
+def _low_precision_sun(t):
+    """
+    ตำแหน่งดวงอาทิตย์จากสูตร Astronomical Almanac
+    คืนค่า (ra ของ equinox of date, dec, ลองจิจูดสุริยวิถี of date, obliquity, ระยะทาง AU) เป็น radians
+    """
+    n = np.asarray(t.tt, dtype=float) - 2451545.0
+    mean_longitude = np.radians((280.460 + 0.9856474 * n) % 360.0)
+    mean_anomaly = np.radians((357.528 + 0.9856003 * n) % 360.0)
+
+    ecliptic_longitude = (mean_longitude
+                          + np.radians(1.915) * np.sin(mean_anomaly)
+                          + np.radians(0.020) * np.sin(2 * mean_anomaly))
+    obliquity = np.radians(23.439 - 0.0000004 * n)
+    distance_au = 1.00014 - 0.01671 * np.cos(mean_anomaly) - 0.00014 * np.cos(2 * mean_anomaly)
+
+    ra = np.arctan2(np.cos(obliquity) * np.sin(ecliptic_longitude), np.cos(ecliptic_longitude))
+    dec = np.arcsin(np.sin(obliquity) * np.sin(ecliptic_longitude))
+    return ra, dec, ecliptic_longitude, obliquity, distance_au
+
+
+def fast_sun_altitude(t, latitude, longitude):
+    """มุมเงยของดวงอาทิตย์ (degrees) สำหรับ Time array แบบ analytic"""
+    ra, dec, _, _, _ = _low_precision_sun(t)
+
+    # Greenwich mean sidereal time จาก UT1
+    d_ut1 = np.asarray(t.ut1, dtype=float) - 2451545.0
+    gmst = np.radians((280.46061837 + 360.98564736629 * d_ut1) % 360.0)
+    hour_angle = gmst + np.radians(longitude) - ra
+
+    lat = np.radians(latitude)
+    sin_alt = np.sin(lat) * np.sin(dec) + np.cos(lat) * np.cos(dec) * np.cos(hour_angle)
+    return np.degrees(np.arcsin(np.clip(sin_alt, -1.0, 1.0)))
+
+
+def fast_sun_position_km(t):
+    """
+    ตำแหน่งดวงอาทิตย์เทียบกับศูนย์กลางโลก (km) shape (3, N) แบบ analytic
+    แปลงลองจิจูดสุริยวิถีกลับไปที่ J2000 ด้วย general precession เพื่อให้อยู่ในแกนเดียวกับ GCRS
+    """
+    _, _, ecliptic_longitude, _, distance_au = _low_precision_sun(t)
+    centuries = (np.asarray(t.tt, dtype=float) - 2451545.0) / 36525.0
+    longitude_j2000 = ecliptic_longitude - np.radians(1.396971 * centuries)
+    obliquity_j2000 = np.radians(23.4392911)
+
+    distance_km = distance_au * AU_KM
+    x = distance_km * np.cos(longitude_j2000)
+    y = distance_km * np.sin(longitude_j2000) * np.cos(obliquity_j2000)
+    z = distance_km * np.sin(longitude_j2000) * np.sin(obliquity_j2000)
+    return np.array([x, y, z])
+
+
+class SunModel:
+    """มุมเงยและตำแหน่งดวงอาทิตย์ตาม accuracy tier"""
+    def __init__(self, eph, accuracy=DEFAULT_ACCURACY):
+        if accuracy not in ACCURACY_TIERS:
+            raise ValueError(f"Unknown accuracy tier '{accuracy}'. Expected one of {ACCURACY_TIERS}")
+        self.eph = eph
+        self.accuracy = accuracy
+
+    def altitude_degrees(self, t, latitude, longitude):
+        if self.accuracy == 'fast':
+            return fast_sun_altitude(t, latitude, longitude)
+
+        from skyfield.api import Topos
+        observer_sun = self.eph['earth'] + Topos(latitude_degrees=latitude, longitude_degrees=longitude)
+        sun_alt, _, _ = observer_sun.at(t).observe(self.eph['sun']).apparent().altaz()
+        return sun_alt.degrees
+
+    def position_km(self, t):
+        if self.accuracy == 'fast':
+            return fast_sun_position_km(t)
+        return (self.eph['sun'] - self.eph['earth']).at(t).position.km
+
+
+def _tle_checksum(line):
+    return str(sum(int(ch) if ch.isdigit() else ch == '-' for ch in line) % 10)
+
+
+def comparison_tles(year, count=20):
+    """ชุด TLE คงที่ (epoch กลางปี) สำหรับ compare_tiers: list ของ {'name', 'tle1', 'tle2'}"""
+    satellites = []
+    for i in range(count):
+        inclination, mean_motion = COMPARISON_ORBITS[i % len(COMPARISON_ORBITS)]
+        satnum = 90000 + i
+        line1 = f'1 {satnum:05d}U 24001A   {year % 100:02d}182.50000000  .00000000  00000-0  00000-0 0  999'
+        line2 = (f'2 {satnum:05d} {inclination:8.4f} {(i * 37) % 360:8.4f} {1000 + (i % 20) * 1000:07d} '
+                 f'{(i * 11) % 360:8.4f} {(i * 73) % 360:8.4f} {mean_motion:11.8f}    1')
+        satellites.append({
+            'name': f'TIERCHECK-{i:02d}',
+            'tle1': line1 + _tle_checksum(line1),
+            'tle2': line2 + _tle_checksum(line2)
+        })
+    return satellites
+
+
+def load_tle_file(path):
+    """อ่านไฟล์ TLE แบบ 3 บรรทัด (ชื่อ, line 1, line 2)"""
+    with open(path, encoding='utf-8') as f:
+        lines = [line.rstrip() for line in f if line.strip()]
+    return [{'name': lines[i].strip(), 'tle1': lines[i + 1], 'tle2': lines[i + 2]}
+            for i in range(0, len(lines) - 2, 3)]
+
+
+def run_calculate_script(payload):
+    """รัน calculate.py ทั้งสคริปต์ด้วย input JSON (แทน stdin) แล้วคืน output JSON"""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calculate.py')
+    stdin = sys.stdin
+    stdout = io.StringIO()
+    try:
+        sys.stdin = io.StringIO(json.dumps(payload))
+        with contextlib.redirect_stdout(stdout):
+            runpy.run_path(script, run_name='__main__')
+    finally:
+        sys.stdin = stdin
+    return json.loads(stdout.getvalue())
+
+
+def random_script_outputs(calculator, satellites, latitude, longitude, date):
+    """
+    dark windows และดาวเทียมที่ถูกเลือกจาก random_satellite_calculate.py (auto mode)
+    ใช้ชุด TLE ที่ส่งมาแทน batch จาก MongoDB
+    """
+    from eclipse import EclipseEngine
+    from random_satellite_calculate import result_rank_key
+
+    grid, periods = calculator.calculate_observation_window(latitude, longitude, date, 'UTC')
+    windows = {(start.timestamp(), end.timestamp()) for start, end in periods}
+    if not grid:
+        return windows, []
+
+    eclipse_engine = EclipseEngine(calculator.eph, grid.t, calculator.eclipse_model, calculator.sun_model)
+    satellite_pairs = calculator.create_satellite_objects_batch(calculator.validate_tle_format(satellites))
+    satellite_pairs = calculator.screen_satellites(satellite_pairs, latitude)
+
+    qualified = []
+    for satellite, sat_data in satellite_pairs:
+        result = calculator.calculate_satellite_visibility_standard(
+            satellite, sat_data, latitude, longitude, grid, eclipse_engine
+        )
+        if result:
+            qualified.append(result)
+
+    qualified.sort(key=result_rank_key, reverse=True)
+    return windows, [result.satellite['name'] for result in qualified[:calculator.target_count]]
+
+
+def compare_sun_positions(ts, eph, year, observers=COMPARISON_OBSERVERS):
+    """
+    เปรียบเทียบ SunModel 'fast' กับ 'standard' ทุก 10 นาทีตลอดปี
+    - มุมเงยดวงอาทิตย์ของ observers ตัวอย่าง
+    - มุมระหว่างทิศดวงอาทิตย์ที่ใช้ตรวจ sunlit
+    """
+    minutes = np.arange(0, 366 * 24 * 60, 10)
+    t = ts.utc(year, 1, 1, 0, minutes)
+
+    standard = SunModel(eph, 'standard')
+    fast = SunModel(eph, 'fast')
+
+    max_altitude_error = 0.0
+    for latitude, longitude in observers:
+        alt_standard = standard.altitude_degrees(t, latitude, longitude)
+        alt_fast = fast.altitude_degrees(t, latitude, longitude)
+        max_altitude_error = max(max_altitude_error, float(np.max(np.abs(alt_fast - alt_standard))))
+
+    pos_standard = standard.position_km(t)
+    pos_fast = fast.position_km(t)
+    cos_angle = np.sum(pos_standard * pos_fast, axis=0) / (np.linalg.norm(pos_standard, axis=0) * np.linalg.norm(pos_fast, axis=0))
+    max_direction_error = float(np.degrees(np.max(np.arccos(np.clip(cos_angle, -1.0, 1.0)))))
+
+    return {
+        'sun_altitude_degrees': max_altitude_error,
+        'sun_direction_degrees': max_direction_error
+    }
+
+
+def compare_tiers(ts, eph, year, observers=COMPARISON_OBSERVERS, satellites=None, step_days=7):
+    """
+    รันโค้ดการมองเห็นของทั้ง 2 สคริปต์ด้วย 'standard' และ 'fast' ทุก step_days วันตลอดปี
+    แล้วนับผลลัพธ์ที่ต่างกัน
+    - calculate.py: นาทีในช่วงมืด (auto night) และ is_visible / is_sunlit ของ minute_results
+    - random_satellite_calculate.py: dark windows และรายชื่อดาวเทียมที่ถูกเลือก (ตามลำดับ)
+    """
+    from random_satellite_calculate import StandardSatelliteVisibilityCalculator
+
+    if satellites is None:
+        satellites = comparison_tles(year)
+
+    calculators = {
+        accuracy: StandardSatelliteVisibilityCalculator(mongo_uri=COMPARISON_MONGO_URI, accuracy=accuracy)
+        for accuracy in ACCURACY_TIERS
+    }
+
+    counts = {key: [0, 0] for key in ('dark_minutes', 'is_visible', 'is_sunlit', 'dark_windows', 'selected_satellites')}
+    dates = [(datetime(year, 1, 1) + timedelta(days=day)).strftime('%Y-%m-%d') for day in range(0, 365, step_days)]
+
+    for latitude, longitude in observers:
+        for date in dates:
+            payload = {'satellites': satellites, 'lat': latitude, 'lon': longitude, 'date': date, 'timezone': 'UTC'}
+            minutes = {
+                accuracy: {row['utc_time']: row['satellites']
+                           for row in run_calculate_script({**payload, 'accuracy': accuracy})['minute_results']}
+                for accuracy in ACCURACY_TIERS
+            }
+            standard, fast = minutes['standard'], minutes['fast']
+            counts['dark_minutes'][0] += len(standard.keys() | fast.keys())
+            counts['dark_minutes'][1] += len(standard.keys() ^ fast.keys())
+            for utc_time in standard.keys() & fast.keys():
+                for row_standard, row_fast in zip(standard[utc_time], fast[utc_time]):
+                    for key in ('is_visible', 'is_sunlit'):
+                        counts[key][0] += 1
+                        counts[key][1] += row_standard[key] != row_fast[key]
+
+            (windows_standard, selected_standard), (windows_fast, selected_fast) = (
+                random_script_outputs(calculators[accuracy], satellites, latitude, longitude, date)
+                for accuracy in ACCURACY_TIERS
+            )
+            counts['dark_windows'][0] += len(windows_standard | windows_fast)
+            counts['dark_windows'][1] += len(windows_standard ^ windows_fast)
+            counts['selected_satellites'][0] += 1
+            counts['selected_satellites'][1] += selected_standard != selected_fast
+
+    for calculator in calculators.values():
+        calculator.close_connection()
+
+    sun_errors = compare_sun_positions(ts, eph, year, observers)
+    mismatch_rates = {key: mismatches / total if total else 0.0 for key, (total, mismatches) in counts.items()}
+
+    return {
+        'year': year,
+        'dates': len(dates),
+        'observers': len(observers),
+        'satellites': len(satellites),
+        **{f'max_{key}_error': round(value, 5) for key, value in sun_errors.items()},
+        'outputs': {key: {'compared': total, 'mismatches': mismatches, 'rate': round(mismatch_rates[key], 6)}
+                    for key, (total, mismatches) in counts.items()},
+        'within_stated_limits': (all(value <= TIER_MAX_ERROR['fast'][key] for key, value in sun_errors.items())
+                                 and all(rate <= TIER_MAX_OUTPUT_MISMATCH['fast'][key] for key, rate in mismatch_rates.items()))
+    }
+
+
+def main():
+    from skyfield.api import load
+
+    year = int(sys.argv[1]) if len(sys.argv) > 1 else datetime.utcnow().year
+    satellites = load_tle_file(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    result = compare_tiers(load.timescale(), load('de440.bsp'), year, satellites=satellites)
+    print(json.dumps(result, indent=2))
+    if not result['within_stated_limits']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Time grid และการจัดรูปแบบเวลาแบบ vectorized
+
+- UTC grid เก็บเป็น epoch seconds (numpy array) แทน list ของ datetime
+- แปลงเป็นเวลาท้องถิ่นด้วยตาราง timezone offset transitions ที่คำนวณล่วงหน้าสำหรับช่วงเวลานั้น
+  (เรียก pytz เพียงไม่กี่ครั้งต่อ window แทนการเรียก astimezone ทุกจุด)
+- จัดรูปแบบ timestamp ทั้ง array ในครั้งเดียวด้วย numpy datetime64
+
+ตรวจความสอดคล้องกับ skyfield ts.from_datetime:
+    python time_grid.py
+"""
+import sys
+from datetime import datetime
+import numpy as np
+import pytz
+
+UTC_SUFFIX = ' UTC'
+
+
+def epoch_seconds(dt):
+    """epoch seconds ของ datetime ที่มี tzinfo"""
+    return dt.timestamp()
+
+
+def utc_grid(start_epoch, end_epoch, step_seconds):
+    """epoch seconds ตั้งแต่ start ถึง end (รวม end ถ้าตรงกับ step) ทุก step_seconds"""
+    if end_epoch < start_epoch:
+        return np.empty(0, dtype=np.int64)
+    count = int(np.floor((end_epoch - start_epoch) / step_seconds + 1e-9)) + 1
+    grid = start_epoch + np.arange(count) * step_seconds
+    if float(start_epoch).is_integer() and float(step_seconds).is_integer():
+        return grid.astype(np.int64)
+    return grid
+
+
+def to_skyfield_time(ts, epochs):
+    """
+    skyfield Time array จาก epoch seconds
+    ส่งวันที่ UTC ของแต่ละ epoch (ไม่ใช่นับจาก 1970) เพื่อให้ skyfield ใช้ leap seconds ของวันนั้น
+    """
+    epochs = np.asarray(epochs, dtype=float)
+    days = np.floor(epochs / 86400.0)
+    dates = days.astype('datetime64[D]')
+    months = dates.astype('datetime64[M]')
+    year = months.astype('datetime64[Y]').astype(int) + 1970
+    month = months.astype(int) % 12 + 1
+    day = (dates - months).astype(int) + 1
+    return ts.utc(year, month, day, 0, 0, epochs - days * 86400.0)
+
+
+def to_utc_datetime(epoch):
+    return datetime.fromtimestamp(float(epoch), pytz.UTC)
+
+
+def format_epochs(epochs):
+    """'YYYY-MM-DD HH:MM:SS' ของทุก epoch (ตัดเศษวินาทีเหมือน strftime)"""
+    seconds = np.floor(np.asarray(epochs, dtype=float)).astype(np.int64)
+    text = np.datetime_as_string(seconds.astype('datetime64[s]'), unit='s')
+    return np.char.replace(text, 'T', ' ')
+
+
+def format_utc(epochs):
+    """'YYYY-MM-DD HH:MM:SS UTC' ของทุก epoch (list ของ str)"""
+    return np.char.add(format_epochs(epochs), UTC_SUFFIX).tolist()
+
+
+class LocalTimeZone:
+    """
+    timezone offsets ของช่วงเวลา [start_epoch, end_epoch]
+    หา transition (เช่น DST) จากการสุ่มทุกชั่วโมงแล้ว bisect หาวินาทีที่เปลี่ยน
+    """
+    def __init__(self, tz, start_epoch, end_epoch):
+        self.tz = tz if not isinstance(tz, str) else pytz.timezone(tz)
+
+        start = int(np.floor(start_epoch)) - 3600
+        end = int(np.ceil(end_epoch)) + 3600
+        samples = list(range(start, end + 3600, 3600))
+
+        transitions = []
+        offsets = [self._offset_at(samples[0])]
+        names = [self._name_at(samples[0])]
+        for lo, hi in zip(samples, samples[1:]):
+            if self._offset_at(hi) == offsets[-1] and self._name_at(hi) == names[-1]:
+                continue
+            # bisect หาวินาทีแรกที่ offset เปลี่ยน
+            while hi - lo > 1:
+                mid = (lo + hi) // 2
+                if self._offset_at(mid) == offsets[-1] and self._name_at(mid) == names[-1]:
+                    lo = mid
+                else:
+                    hi = mid
+            transitions.append(hi)
+            offsets.append(self._offset_at(hi))
+            names.append(self._name_at(hi))
+
+        self.transition_epochs = np.array(transitions, dtype=float)
+        self.offsets = np.array(offsets, dtype=float)
+        self.names = names
+        self._zone_suffixes = np.array([' ' + name for name in names])
+
+    def _local(self, epoch):
+        return datetime.fromtimestamp(epoch, self.tz)
+
+    def _offset_at(self, epoch):
+        return self._local(epoch).utcoffset().total_seconds()
+
+    def _name_at(self, epoch):
+        return self._local(epoch).tzname()
+
+    def segment_index(self, epochs):
+        return np.searchsorted(self.transition_epochs, np.asarray(epochs, dtype=float), side='right')
+
+    def local_epochs(self, epochs):
+        epochs = np.asarray(epochs, dtype=float)
+        return epochs + self.offsets[self.segment_index(epochs)]
+
+    def format(self, epochs, with_zone=True):
+        """
+        เวลาท้องถิ่นของทุก epoch (list ของ str)
+        with_zone=True: 'YYYY-MM-DD HH:MM:SS ABBR' (เหมือน strftime '%Y-%m-%d %H:%M:%S %Z')
+        """
+        epochs = np.asarray(epochs, dtype=float)
+        text = format_epochs(self.local_epochs(epochs))
+        if with_zone:
+            text = np.char.add(text, self._zone_suffixes[self.segment_index(epochs)])
+        return text.tolist()
+
+    def to_datetime(self, epoch):
+        """datetime ท้องถิ่น (มี tzinfo) ของ epoch เดียว"""
+        return self._local(float(epoch))
+
+
+def compare_with_skyfield(ts, instants=None):
+    """
+    เปรียบเทียบ to_skyfield_time กับ ts.from_datetime ที่เวลาตัวอย่าง
+    คืนค่า dict: ความต่างสูงสุด (วินาที) และผ่านเกณฑ์ 1 ms หรือไม่
+    """
+    if instants is None:
+        instants = [datetime(2026, 10, 19, 12, 0, 0, tzinfo=pytz.UTC),
+                    datetime(2016, 12, 31, 23, 0, 0, tzinfo=pytz.UTC),
+                    datetime(2024, 2, 29, 18, 30, 15, tzinfo=pytz.UTC)]
+
+    max_error = 0.0
+    for instant in instants:
+        epochs = epoch_seconds(instant) + np.arange(0, 6 * 3600, 60)
+        ours = to_skyfield_time(ts, epochs)
+        reference = ts.from_datetimes([to_utc_datetime(epoch) for epoch in epochs])
+        max_error = max(max_error, float(np.max(np.abs(ours.tt - reference.tt))) * 86400.0)
+
+    return {
+        'instants': [instant.isoformat() for instant in instants],
+        'max_error_seconds': max_error,
+        'within_limit': max_error < 1e-3
+    }
+
+
+def main():
+    from skyfield.api import load
+
+    result = compare_with_skyfield(load.timescale())
+    print(result)
+    if not result['within_limit']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
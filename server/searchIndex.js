@@ -0,0 +1,270 @@
+// ===== SATELLITE SEARCH INDEX =====
+// In-memory index สำหรับ /search สร้างจาก snapshot ของ collection satellite
+// - ชื่อ: prefix lookup ด้วย sorted array + binary search และ substring ด้วย trigram
+// - NORAD ID / COSPAR ID (OBJECT_ID): exact lookup ด้วย Map
+// - refresh(): อัปเดตเฉพาะเอกสารที่ date_process ใหม่กว่ารอบก่อน
+// - rebuild(): สร้างใหม่ทั้งหมด (ใช้ตอนเริ่ม server และเป็นระยะเพื่อลบวัตถุที่ถูกลบออกจาก catalog)
+
+const INDEX_FIELDS = '_id OBJECT_NAME NORAD_CAT_ID OBJECT_ID date_process';
+const MAX_CANDIDATES = 500;
+
+const RANK = {
+  exact: 0,
+  prefix: 1,
+  wordPrefix: 2,
+  substring: 3
+};
+
+export const normalizeName = (name) => String(name || '')
+  .normalize('NFKD')
+  .toUpperCase()
+  .replace(/[^A-Z0-9]+/g, ' ')
+  .trim();
+
+const normalizeId = (id) => String(id || '').trim().toUpperCase();
+
+const trigramsOf = (text) => {
+  const grams = new Set();
+  for (let i = 0; i + 3 <= text.length; i++) {
+    grams.add(text.slice(i, i + 3));
+  }
+  return grams;
+};
+
+// index แรกใน sorted array ที่ key >= target
+const lowerBound = (sorted, target) => {
+  let lo = 0;
+  let hi = sorted.length;
+  while (lo < hi) {
+    const mid = (lo + hi) >>> 1;
+    if (sorted[mid].key < target) lo = mid + 1;
+    else hi = mid;
+  }
+  return lo;
+};
+
+// index แรกใน sorted array ของตัวเลขที่ >= target เริ่มจาก from (galloping แล้ว binary search)
+const gallop = (list, target, from) => {
+  let lo = from;
+  let hi = from;
+  let step = 1;
+  while (hi < list.length && list[hi] < target) {
+    lo = hi + 1;
+    hi += step;
+    step *= 2;
+  }
+  hi = Math.min(hi, list.length);
+  while (lo < hi) {
+    const mid = (lo + hi) >>> 1;
+    if (list[mid] < target) lo = mid + 1;
+    else hi = mid;
+  }
+  return lo;
+};
+
+class SatelliteSearchIndex {
+  constructor(model) {
+    this.model = model;
+    this.reset();
+  }
+
+  reset() {
+    this.entries = [];            // [{ id, name, norm }] (null = ถูกแทนที่แล้ว)
+    this.byDocId = new Map();     // _id -> entry index
+    this.byNoradId = new Map();   // NORAD_CAT_ID -> Set(entry index)
+    this.byObjectId = new Map();  // OBJECT_ID (COSPAR) -> Set(entry index)
+    this.trigrams = new Map();    // trigram -> [entry index] (เรียงจากน้อยไปมาก)
+    this.sortedKeys = [];         // [{ key, idx }] key = ชื่อเต็มหรือคำในชื่อ
+    this.lastUpdate = null;
+    this.ready = false;
+  }
+
+  get size() {
+    return this.byDocId.size;
+  }
+
+  _addToMapSet(map, key, idx) {
+    if (!key) return;
+    if (!map.has(key)) map.set(key, new Set());
+    map.get(key).add(idx);
+  }
+
+  _removeFromMapSet(map, key, idx) {
+    const set = map.get(key);
+    if (!set) return;
+    set.delete(idx);
+    if (set.size === 0) map.delete(key);
+  }
+
+  _insert(doc) {
+    const docId = String(doc._id);
+    const previous = this.byDocId.get(docId);
+
+    if (previous !== undefined) {
+      const old = this.entries[previous];
+      this._removeFromMapSet(this.byNoradId, old.noradId, previous);
+      this._removeFromMapSet(this.byObjectId, old.objectId, previous);
+      this.entries[previous] = null;
+    }
+
+    const idx = this.entries.length;
+    const entry = {
+      id: docId,
+      name: doc.OBJECT_NAME || '',
+      norm: normalizeName(doc.OBJECT_NAME),
+      noradId: normalizeId(doc.NORAD_CAT_ID),
+      objectId: normalizeId(doc.OBJECT_ID)
+    };
+
+    this.entries.push(entry);
+    this.byDocId.set(docId, idx);
+    this._addToMapSet(this.byNoradId, entry.noradId, idx);
+    this._addToMapSet(this.byObjectId, entry.objectId, idx);
+
+    for (const gram of trigramsOf(entry.norm)) {
+      if (!this.trigrams.has(gram)) this.trigrams.set(gram, []);
+      this.trigrams.get(gram).push(idx);
+    }
+
+    if (doc.date_process && (!this.lastUpdate || doc.date_process > this.lastUpdate)) {
+      this.lastUpdate = doc.date_process;
+    }
+  }
+
+  _rebuildSortedKeys() {
+    const keys = [];
+    this.entries.forEach((entry, idx) => {
+      if (!entry || !entry.norm) return;
+      keys.push({ key: entry.norm, idx });
+      for (const word of entry.norm.split(' ').slice(1)) {
+        keys.push({ key: word, idx });
+      }
+    });
+    keys.sort((a, b) => (a.key < b.key ? -1 : a.key > b.key ? 1 : a.idx - b.idx));
+    this.sortedKeys = keys;
+  }
+
+  async rebuild() {
+    const docs = await this.model.find({}, INDEX_FIELDS).lean();
+    this.reset();
+    for (const doc of docs) this._insert(doc);
+    this._rebuildSortedKeys();
+    this.ready = true;
+    console.log(`Search index built: ${this.size} satellites`);
+    return this.size;
+  }
+
+  // เพิ่ม/อัปเดตเฉพาะเอกสารที่ถูก refresh TLE หลังรอบก่อน
+  async refresh() {
+    if (!this.ready) return this.rebuild();
+
+    const query = this.lastUpdate ? { date_process: { $gt: this.lastUpdate } } : {};
+    const docs = await this.model.find(query, INDEX_FIELDS).lean();
+    if (docs.length === 0) return 0;
+
+    for (const doc of docs) this._insert(doc);
+
+    // trigram posting lists มี index ที่ถูกแทนที่ค้างอยู่ ถ้ามากเกินไปให้สร้างใหม่ทั้งหมด
+    if (this.entries.length > this.size * 2) {
+      return this.rebuild();
+    }
+
+    this._rebuildSortedKeys();
+    console.log(`Search index refreshed: ${docs.length} satellites updated`);
+    return docs.length;
+  }
+
+  // ค้นหาด้วย NORAD ID หรือ COSPAR ID แบบ exact
+  lookupId(id, limit = 10) {
+    const key = normalizeId(id);
+    const indices = new Set([
+      ...(this.byNoradId.get(key) || []),
+      ...(this.byObjectId.get(key) || [])
+    ]);
+    return [...indices].slice(0, limit).map(idx => this.entries[idx].id);
+  }
+
+  _prefixMatches(query, limit) {
+    const matches = new Map();
+    let i = lowerBound(this.sortedKeys, query);
+    while (i < this.sortedKeys.length && matches.size < limit) {
+      const { key, idx } = this.sortedKeys[i];
+      if (!key.startsWith(query)) break;
+      if (this.entries[idx] && !matches.has(idx)) {
+        const entry = this.entries[idx];
+        const rank = entry.norm === query ? RANK.exact
+          : entry.norm.startsWith(query) ? RANK.prefix
+          : RANK.wordPrefix;
+        matches.set(idx, rank);
+      }
+      i++;
+    }
+    return matches;
+  }
+
+  // intersect posting lists โดยไล่ list ที่สั้นที่สุด แล้ว probe list อื่นด้วย galloping
+  // (posting lists เรียงจากน้อยไปมากอยู่แล้ว ไม่ต้องคัดลอก งานต่อ query ถูกจำกัดด้วย MAX_CANDIDATES)
+  _substringMatches(query, limit) {
+    const postings = [...trigramsOf(query)].map(gram => this.trigrams.get(gram) || []);
+    if (postings.length === 0) return new Map();
+
+    postings.sort((a, b) => a.length - b.length);
+    const [smallest, ...rest] = postings;
+    const cursors = rest.map(() => 0);
+
+    const matches = new Map();
+    let checked = 0;
+    for (const idx of smallest) {
+      if (matches.size >= limit || checked >= MAX_CANDIDATES) break;
+      checked++;
+      const entry = this.entries[idx];
+      if (!entry) continue;
+
+      let inAll = true;
+      for (let k = 0; k < rest.length; k++) {
+        cursors[k] = gallop(rest[k], idx, cursors[k]);
+        if (rest[k][cursors[k]] !== idx) {
+          inAll = false;
+          break;
+        }
+      }
+      if (inAll && entry.norm.includes(query)) matches.set(idx, RANK.substring);
+    }
+    return matches;
+  }
+
+  // ค้นหาด้วยชื่อ: exact > prefix > word prefix > substring
+  searchName(name, limit = 10) {
+    const query = normalizeName(name);
+    if (!query) return [];
+
+    const candidates = this._prefixMatches(query, MAX_CANDIDATES);
+    if (candidates.size < limit && query.length >= 3) {
+      for (const [idx, rank] of this._substringMatches(query, limit * 4)) {
+        if (!candidates.has(idx)) candidates.set(idx, rank);
+      }
+    }
+
+    return [...candidates.entries()]
+      .map(([idx, rank]) => ({ entry: this.entries[idx], rank }))
+      .sort((a, b) => a.rank - b.rank
+        || a.entry.norm.length - b.entry.norm.length
+        || (a.entry.norm < b.entry.norm ? -1 : a.entry.norm > b.entry.norm ? 1 : 0))
+      .slice(0, limit)
+      .map(({ entry }) => entry.id);
+  }
+
+  // ทำ refresh เป็นระยะ และ rebuild ทั้งหมดทุก rebuildEvery ครั้ง
+  schedule(intervalMs, rebuildEvery = 24) {
+    let runs = 0;
+    const timer = setInterval(() => {
+      runs++;
+      const task = runs % rebuildEvery === 0 ? this.rebuild() : this.refresh();
+      task.catch(err => console.error('Search index refresh error:', err));
+    }, intervalMs);
+    timer.unref();
+    return timer;
+  }
+}
+
+export default SatelliteSearchIndex;
@@ -11,6 +11,7 @@ import geoTz from 'geo-tz/all';
 import User from '../models/user.js';
 import Satellite from '../models/satellite.js';
 import Token from '../models/token.js';
+import SatelliteSearchIndex from './searchIndex.js';
 
 dotenv.config();
 
@@ -28,10 +29,17 @@ app.use(express.json());
 app.use(express.urlencoded({ extended: true }));
 
 // ===== DATABASE CONNECTION =====
+const searchIndex = new SatelliteSearchIndex(Satellite);
+const SEARCH_INDEX_REFRESH_MS = parseInt(process.env.SEARCH_INDEX_REFRESH_MS, 10) || 60 * 60 * 1000;
+
 mongoose.connect(process.env.MONGODB_URI || process.env.MONGO_URI)
   .then(() => {
     console.log('MongoDB connected successfully');
     console.log('Database name:', mongoose.connection.db.databaseName);
+
+    searchIndex.rebuild()
+      .then(() => searchIndex.schedule(SEARCH_INDEX_REFRESH_MS))
+      .catch(err => console.error('Search index build error:', err));
   })
   .catch(err => console.error('MongoDB connection error:', err));
 
@@ -63,6 +71,10 @@ const randomSatelliteScriptPath = path.join(__dirname, '../python/random_satelli
 const isValidDate = (dateString) => /^\d{4}-\d{2}-\d{2}$/.test(dateString);
 const isValidTime = (timeString) => /^\d{2}:\d{2}$/.test(timeString);
 const isCustomTimeMode = (startTime, endTime) => startTime && endTime && isValidTime(startTime) && isValidTime(endTime);
+const ECLIPSE_MODELS = ['cylindrical', 'cone'];
+const isValidEclipseModel = (model) => ECLIPSE_MODELS.includes(model);
+const ACCURACY_TIERS = ['standard', 'fast'];
+const isValidAccuracy = (accuracy) => ACCURACY_TIERS.includes(accuracy);
 
 // Helper function เพื่อตรวจสอบว่า token หมดอายุหรือยัง
 const isTokenExpired = (expiresAt) => {
@@ -212,7 +224,7 @@ const authenticateAPI = async (req, res, next) => {
 const validateCalculateRequest = (req, res, next) => {
   console.log('Received request body:', req.body);
 
-  let { lat, lon, date, satellites, start_time, end_time } = req.body;
+  let { lat, lon, date, satellites, start_time, end_time, eclipse_model, accuracy } = req.body;
 
   try {
     lat = parseFloat(lat);
@@ -273,6 +285,22 @@ const validateCalculateRequest = (req, res, next) => {
       }
     }
 
+    if (eclipse_model && !isValidEclipseModel(eclipse_model)) {
+      return res.status(400).json({ 
+        success: false,
+        error: `Invalid eclipse_model. Expected one of: ${ECLIPSE_MODELS.join(', ')}.`,
+        message: 'Invalid eclipse model'
+      });
+    }
+
+    if (accuracy && !isValidAccuracy(accuracy)) {
+      return res.status(400).json({ 
+        success: false,
+        error: `Invalid accuracy. Expected one of: ${ACCURACY_TIERS.join(', ')}.`,
+        message: 'Invalid accuracy tier'
+      });
+    }
+
     console.log('Validation passed for calculate request');
     console.log(`Time mode detected: ${actualTimeMode}`);
     if (actualTimeMode === 'custom') {
@@ -289,7 +317,9 @@ const validateCalculateRequest = (req, res, next) => {
       satellites,
       start_time: start_time || '',
       end_time: end_time || '',
-      time_mode: actualTimeMode
+      time_mode: actualTimeMode,
+      eclipse_model: eclipse_model || 'cylindrical',
+      accuracy: accuracy || 'standard'
     };
     next();
 
@@ -306,7 +336,7 @@ const validateCalculateRequest = (req, res, next) => {
 const validateRandomSatelliteRequest = (req, res, next) => {
   console.log('Received random satellite request body:', req.body);
   
-  let { lat, lon, date, timezone, start_time, end_time, time_mode } = req.body;
+  let { lat, lon, date, timezone, start_time, end_time, time_mode, eclipse_model, include_passes, accuracy } = req.body;
 
   try {
     lat = parseFloat(lat);
@@ -350,6 +380,22 @@ const validateRandomSatelliteRequest = (req, res, next) => {
       }
     }
 
+    if (eclipse_model && !isValidEclipseModel(eclipse_model)) {
+      return res.status(400).json({ 
+        success: false,
+        error: `Invalid eclipse_model. Expected one of: ${ECLIPSE_MODELS.join(', ')}.`,
+        message: 'Invalid eclipse model'
+      });
+    }
+
+    if (accuracy && !isValidAccuracy(accuracy)) {
+      return res.status(400).json({ 
+        success: false,
+        error: `Invalid accuracy. Expected one of: ${ACCURACY_TIERS.join(', ')}.`,
+        message: 'Invalid accuracy tier'
+      });
+    }
+
     console.log('Validation passed for random satellite request');
     console.log(`Random satellite time mode detected: ${actualTimeMode}`);
     if (actualTimeMode === 'custom') {
@@ -365,7 +411,10 @@ const validateRandomSatelliteRequest = (req, res, next) => {
       timezone,
       start_time: start_time || '',
       end_time: end_time || '',
-      time_mode: actualTimeMode
+      time_mode: actualTimeMode,
+      eclipse_model: eclipse_model || 'cylindrical',
+      include_passes: include_passes === true || include_passes === 'true',
+      accuracy: accuracy || 'standard'
     };
     next();
 
@@ -673,29 +722,46 @@ app.get('/search', authenticateAPI, async (req, res) => {
 
     let searchQuery = {};
     let searchType = '';
+    let rankedIds = null;
 
     if (norad_id) {
       // ค้นหาด้วย NORAD ID
       searchType = 'NORAD ID';
       console.log('Searching satellites with NORAD ID:', norad_id);
       
-      searchQuery = {
-        $or: [
-          { NORAD_CAT_ID: norad_id },
-          { OBJECT_ID: norad_id }
-        ]
-      };
+      if (searchIndex.ready) {
+        rankedIds = searchIndex.lookupId(norad_id, 10);
+      } else {
+        searchQuery = {
+          $or: [
+            { NORAD_CAT_ID: norad_id },
+            { OBJECT_ID: norad_id }
+          ]
+        };
+      }
     } else {
       // ค้นหาด้วยชื่อ
       searchType = 'Name';
       console.log('Searching satellites with name:', name);
       
-      searchQuery = {
-        OBJECT_NAME: { $regex: name, $options: 'i' }
-      };
+      if (searchIndex.ready) {
+        rankedIds = searchIndex.searchName(name, 10);
+      } else {
+        searchQuery = {
+          OBJECT_NAME: { $regex: name, $options: 'i' }
+        };
+      }
     }
 
-    const satellites = await Satellite.find(searchQuery).limit(10);
+    let satellites;
+    if (rankedIds) {
+      // ดึงเอกสารด้วย _id แล้วเรียงตามลำดับจาก search index
+      const docs = await Satellite.find({ _id: { $in: rankedIds } });
+      const docsById = new Map(docs.map(doc => [String(doc._id), doc]));
+      satellites = rankedIds.map(id => docsById.get(id)).filter(Boolean);
+    } else {
+      satellites = await Satellite.find(searchQuery).limit(10);
+    }
 
     console.log(`Found ${satellites.length} satellites by ${searchType}`);
     